@@ -0,0 +1,84 @@
+import pandas as pd
+from DataSchema import parse_dates, to_cents
+
+class AggregateCube:
+    # Dimensões agregadas, quando presentes no DataFrame, além do mês de pagamento
+    DIMENSIONS = ('Tipo', 'Categoria', 'Fornecedor', 'Cliente')
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Cubo de agregados mensais (mês × Tipo × Categoria × contraparte) com somas e contagens.
+        Construído em uma única passada sobre os dados brutos, sem alterar o DataFrame original;
+        as análises consultam o cubo em vez de reagrupar as linhas. As somas são feitas em
+        centavos inteiros, sem acúmulo de erro de arredondamento.
+        :param df: DataFrame com 'Valor' e, opcionalmente, 'Data Pagamento' e as dimensões.
+        """
+        keys = {}
+        if 'Data Pagamento' in df.columns:
+            keys['Mes'] = parse_dates(df['Data Pagamento']).dt.to_period('M')
+        for dimension in self.DIMENSIONS:
+            if dimension in df.columns:
+                keys[dimension] = df[dimension]
+
+        self.dimensions = list(keys)
+        self.rows = len(df)
+        frame = pd.DataFrame(keys, index=df.index)
+        frame['Valor'] = to_cents(df['Valor'])
+
+        if self.dimensions:
+            cells = frame.groupby(self.dimensions, dropna=False, observed=True)['Valor'].agg(['sum', 'count'])
+            self.cells = cells.rename(columns={'sum': 'Valor', 'count': 'Quantidade'}).reset_index()
+        else:
+            self.cells = pd.DataFrame({'Valor': [frame['Valor'].sum()], 'Quantidade': [frame['Valor'].count()]})
+        self.cells['Valor'] = self.cells['Valor'].astype('float64') / 100
+
+    def _select(self, filters):
+        cells = self.cells
+        for column, value in filters.items():
+            cells = cells[cells[column] == value]
+        return cells
+
+    def total(self, by=None, **filters):
+        """
+        Soma dos valores, opcionalmente agrupada por uma ou mais dimensões.
+        :param by: Dimensão (ou lista de dimensões) de agrupamento.
+        :param filters: Filtros de igualdade por dimensão, ex.: Tipo='Custo'.
+        """
+        cells = self._select(filters)
+        if by is None:
+            return cells['Valor'].sum()
+        return cells.groupby(by)['Valor'].sum()
+
+    def count(self, **filters):
+        """
+        Quantidade de linhas que atendem aos filtros.
+        """
+        return int(self._select(filters)['Quantidade'].sum())
+
+    def monthly(self, by=None, **filters):
+        """
+        Totais por mês (PeriodIndex), opcionalmente com uma coluna por valor de outra dimensão.
+        """
+        cells = self._select(filters)
+        cells = cells[cells['Mes'].notna()]
+        if by is None:
+            return cells.groupby('Mes')['Valor'].sum()
+        return cells.groupby(['Mes', by])['Valor'].sum().unstack(fill_value=0)
+
+    def top(self, by, n=5, **filters):
+        """
+        Os n maiores totais de uma dimensão.
+        """
+        return self.total(by, **filters).nlargest(n)
+
+def get_cube(data):
+    """
+    Retorna o cubo de um DataFrame, ou o próprio AggregateCube se um cubo pronto for informado.
+    O cubo não é guardado entre chamadas: DataFrames podem ser alterados no lugar (como faz
+    classify_costs), e um cubo associado ao objeto ficaria desatualizado. Para várias análises
+    sobre os mesmos dados, construa o AggregateCube uma vez e passe-o às análises, ou use
+    DataReader.read_cube, que guarda o cubo por versão das partições.
+    """
+    if isinstance(data, AggregateCube):
+        return data
+    return AggregateCube(data)
@@ -1,10 +1,10 @@
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QStackedWidget, QPushButton, QLabel, QVBoxLayout, QWidget, QFileDialog, QMessageBox, QDialog, QComboBox, QCheckBox, QFormLayout
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtWidgets import QApplication, QMainWindow, QStackedWidget, QPushButton, QLabel, QVBoxLayout, QWidget, QFileDialog, QMessageBox, QDialog, QComboBox, QCheckBox, QFormLayout, QProgressDialog
+from PyQt5.QtCore import Qt, QDate, QTimer, QPointF
 from PyQt5.QtChart import QChart, QChartView, QLineSeries, QValueAxis
 from PyQt5.QtGui import QPainter
-from application_controller import ApplicationController
-import pandas as pd
+from ApplicationController import ApplicationController
+from BackgroundTasks import TaskRunner
 import os
 
 class DataSelectionDialog(QDialog):
@@ -52,6 +52,9 @@ class MainWindow(QMainWindow):
 
         self.app_controller = app_controller
 
+        # Importações e análises rodam em workers; os resultados voltam pela thread da interface
+        self.tasks = TaskRunner()
+
         self.setWindowTitle("Fabri Log Dashboard")
         self.setGeometry(100, 100, 1200, 800)
 
@@ -75,6 +78,33 @@ class MainWindow(QMainWindow):
 
         self.central_widget.setCurrentWidget(self.home_screen)
 
+        # Os dados são carregados depois que a janela é exibida, não durante a construção
+        QTimer.singleShot(0, self.refresh_home_screen)
+
+    def refresh_home_screen(self):
+        self.update_cash_label()
+        self.refresh_financial_chart()
+
+    def update_cash_label(self):
+        self.tasks.start("saldo", self.load_cash_balance, on_result=self.show_cash_balance)
+
+    def load_cash_balance(self, progress_callback=None):
+        """
+        Executado em um worker: o primeiro acesso aos totais acumulados pode reconstruí-los a
+        partir das partições.
+        :return: Saldo atual, ou None se não houver receitas registradas.
+        """
+        balance = self.app_controller.current_balance()
+        if balance is None or self.app_controller.running_totals.total('Receita')[1] == 0:
+            return None
+        return balance
+
+    def show_cash_balance(self, balance):
+        if balance is not None:
+            self.cash_label.setText(f"Saldo Atual: R$ {balance:,.2f}")
+        else:
+            self.cash_label.setText("Saldo Atual: Dados insuficientes")
+
     def create_home_screen(self):
         widget = QWidget()
         layout = QVBoxLayout()
@@ -123,14 +153,10 @@ class MainWindow(QMainWindow):
         series_results.setName("Resultado")
         series_trend.setName("Tendência")
 
-        # Obter dados do controlador
-        data = self.app_controller.analyze_financial_data()
-        if data is not None:
-            for i, row in data.iterrows():
-                series_costs.append(i, row["Custos"])
-                series_revenues.append(i, row["Receitas"])
-                series_results.append(i, row["Resultado"])
-                series_trend.append(i, row["Tendência"])
+        # Séries preenchidas por refresh_financial_chart, fora da construção da janela
+        self.chart_series = {"Custos": series_costs, "Receitas": series_revenues,
+                             "Resultado": series_results, "Tendência": series_trend}
+        self.chart_samplers = {}
 
         chart.addSeries(series_costs)
         chart.addSeries(series_revenues)
@@ -154,12 +180,63 @@ class MainWindow(QMainWindow):
         series_results.attachAxis(axis_y)
         series_trend.attachAxis(axis_x)
         series_trend.attachAxis(axis_y)
+        self.chart_axes = (axis_x, axis_y)
+
+        # Ao aproximar (seleção horizontal), a janela visível é reamostrada da série completa
+        axis_x.rangeChanged.connect(self.resample_financial_chart)
 
         chart_view = QChartView(chart)
         chart_view.setRenderHint(QPainter.Antialiasing)
+        chart_view.setRubberBand(QChartView.HorizontalRubberBand)
 
         return chart_view
 
+    def refresh_financial_chart(self):
+        # Obter dados do controlador e preparar as séries em segundo plano
+        self.tasks.start("grafico", self.load_chart_data, on_result=self.populate_financial_chart)
+
+    def load_chart_data(self, progress_callback=None):
+        """
+        Executado em um worker: lê o resumo e guarda as séries completas para redução por pixel.
+        """
+        from ChartSampler import SeriesDownsampler
+
+        data = self.app_controller.analyze_financial_data(progress_callback=progress_callback)
+        if data is None or data.empty:
+            return {}
+        return {column: SeriesDownsampler(data.index, data[column], method="minmax") for column in self.chart_series}
+
+    def populate_financial_chart(self, samplers):
+        self.chart_samplers = samplers
+        bounds = [sampler.bounds() for sampler in samplers.values() if len(sampler)]
+        if not bounds:
+            for series in self.chart_series.values():
+                series.clear()
+            return
+
+        axis_x, axis_y = self.chart_axes
+        axis_y.setRange(min(bound[2] for bound in bounds), max(bound[3] for bound in bounds))
+        x_range = (min(bound[0] for bound in bounds), max(bound[1] for bound in bounds))
+        if (axis_x.min(), axis_x.max()) == x_range:
+            self.resample_financial_chart(*x_range)
+        else:
+            axis_x.setRange(*x_range)  # rangeChanged dispara a reamostragem
+
+    def resample_financial_chart(self, x_min, x_max):
+        """
+        Substitui os pontos de cada série, de uma vez, pela janela visível reduzida à largura do gráfico.
+        """
+        if not self.chart_samplers:
+            return
+        width = max(int(self.chart_view.chart().plotArea().width()), 200)
+        for column, series in self.chart_series.items():
+            sampler = self.chart_samplers.get(column)
+            if sampler is None:
+                series.clear()
+                continue
+            xs, ys = sampler.sample(width, x_min, x_max)
+            series.replace([QPointF(x, y) for x, y in zip(xs.tolist(), ys.tolist())])
+
     def create_financial_screen(self):
         widget = QWidget()
         layout = QVBoxLayout()
@@ -221,25 +298,54 @@ class MainWindow(QMainWindow):
         try:
             renamed_file_path = os.path.join(self.app_controller.storage_path, f"{file_name}.xlsx")
 
+            append = False
             if os.path.exists(renamed_file_path):
                 response = QMessageBox.question(self, "Arquivo Existente", "Dados para este mês já existem. Deseja adicionar ou sobrescrever?", 
                                                 QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-                if response == QMessageBox.No:
-                    os.remove(renamed_file_path)
+                append = response == QMessageBox.Yes
+                os.remove(renamed_file_path)
 
             os.rename(file_path, renamed_file_path)
 
-            success = self.app_controller.import_excel_data(renamed_file_path, data_type, selected_date)
-            if success:
-                QMessageBox.information(self, "Sucesso", "Dados importados com sucesso.")
-                self.update_financial_display()
-            else:
-                QMessageBox.warning(self, "Erro", "Falha ao adicionar dados.")
+            data_type = "programados" if is_programmed else data_type.lower()
+            progress = QProgressDialog("Importando dados...", "Cancelar", 0, 0, self)
+            progress.setWindowTitle("Importação")
+            progress.setWindowModality(Qt.WindowModal)
+            progress.setMinimumDuration(500)
+
+            def on_progress(processed, total):
+                progress.setMaximum(max(total, processed))
+                progress.setValue(processed)
+
+            def on_result(success):
+                progress.close()
+                if success:
+                    QMessageBox.information(self, "Sucesso", "Dados importados com sucesso.")
+                    self.update_financial_display()
+                    self.refresh_home_screen()
+                else:
+                    QMessageBox.warning(self, "Erro", "Falha ao adicionar dados.")
+
+            def on_error(message):
+                progress.close()
+                QMessageBox.critical(self, "Erro Crítico", f"Erro ao processar arquivo: {message}")
+
+            def on_cancel():
+                progress.close()
+                QMessageBox.information(self, "Importação Cancelada", "A importação foi cancelada.")
+
+            task = self.tasks.start("importacao", self.app_controller.import_excel_data, renamed_file_path, data_type,
+                                    selected_date, append=append, on_result=on_result, on_progress=on_progress,
+                                    on_error=on_error, on_cancel=on_cancel)
+            progress.canceled.connect(task.cancel)
         except Exception as e:
             QMessageBox.critical(self, "Erro Crítico", f"Erro ao processar arquivo: {e}")
 
     def update_financial_display(self):
-        analysis = self.app_controller.analyze_financial_data()
+        self.financial_display.setText("Carregando dados financeiros...")
+        self.tasks.start("analise", self.app_controller.analyze_financial_data, on_result=self.show_financial_display)
+
+    def show_financial_display(self, analysis):
         if analysis is not None:
             self.financial_display.setText(f"Dados Financeiros: {analysis.to_string(index=False)}")
         else:
@@ -254,10 +360,21 @@ class MainWindow(QMainWindow):
     def show_configuration_screen(self):
         self.central_widget.setCurrentWidget(self.configuration_screen)
 
+    def closeEvent(self, event):
+        self.tasks.shutdown()
+        super().closeEvent(event)
+
     def clear_data(self):
+        # Tarefas canceladas ainda podem estar gravando partições ou totais: a limpeza só
+        # acontece depois que todas terminarem
+        self.tasks.cancel_all()
+        self.tasks.when_idle(self._clear_all_data)
+
+    def _clear_all_data(self):
         confirmation = self.app_controller.clear_all_data()
         if confirmation:
             QMessageBox.information(self, "Sucesso", "Todos os dados foram limpos com sucesso.")
+            self.update_cash_label()
         else:
             QMessageBox.warning(self, "Erro", "Falha ao limpar os dados.")
 
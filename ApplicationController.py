@@ -1,8 +1,6 @@
 import logging
 import os
-from DataReader import DataReader
-from FinancialProcessor import FinancialProcessor
-from SecurityMonitor import SecurityMonitor
+import threading
 
 class ApplicationController:
     def __init__(self, encryption_key, storage_path="utils/data/"):
@@ -14,10 +12,58 @@ class ApplicationController:
         self.encryption_key = encryption_key
         self.storage_path = storage_path
 
-        # Inicializar módulos
-        self.data_reader = DataReader(encryption_key, storage_path)
-        self.processor = FinancialProcessor()
-        self.security_monitor = SecurityMonitor(data_paths=[storage_path])
+        # Módulos (pandas, criptografia, monitor) são carregados apenas no primeiro uso,
+        # para que a abertura da aplicação e operações simples não paguem sua importação
+        self._modules = {}
+        self._modules_lock = threading.RLock()
+
+    def _module(self, name, factory):
+        """
+        Retorna o módulo já inicializado ou o cria na primeira chamada.
+        """
+        with self._modules_lock:
+            if name not in self._modules:
+                self._modules[name] = factory()
+            return self._modules[name]
+
+    @property
+    def data_reader(self):
+        def factory():
+            from DataReader import DataReader
+            return DataReader(self.encryption_key, self.storage_path)
+        return self._module("data_reader", factory)
+
+    @property
+    def importer(self):
+        def factory():
+            from ExcelImporter import ExcelImporter
+            return ExcelImporter(self.encryption_key, self.storage_path)
+        return self._module("importer", factory)
+
+    @property
+    def processor(self):
+        def factory():
+            from FinancialProcessor import FinancialProcessor
+            return FinancialProcessor()
+        return self._module("processor", factory)
+
+    @property
+    def security_monitor(self):
+        def factory():
+            from SecurityMonitor import SecurityMonitor
+            return SecurityMonitor(data_paths=[self.storage_path], signing_key=self.encryption_key)
+        return self._module("security_monitor", factory)
+
+    @property
+    def running_totals(self):
+        def factory():
+            from RunningTotals import RunningTotals
+            totals = RunningTotals(self.storage_path, self.encryption_key)
+            if not totals.exists():
+                # Armazenamento anterior aos totais: o importador os reconstrói das partições
+                self.importer
+            return totals
+        return self._module("running_totals", factory)
 
     def import_data(self, file_path, data_type, selected_date):
         """
@@ -28,7 +74,7 @@ class ApplicationController:
         """
         try:
             logging.info(f"Importando dados do arquivo: {file_path}")
-            data = self.data_reader.import_financial_data(file_path, data_type, selected_date)
+            data = self.importer.import_financial_data(file_path, data_type, selected_date)
             if data is not None:
                 logging.info(f"Dados de {data_type} importados com sucesso para {selected_date}.")
                 return True
@@ -39,6 +85,67 @@ class ApplicationController:
             logging.error(f"Erro ao importar dados: {e}")
             return False
 
+    def import_excel_data(self, file_path, data_type, selected_date, append=False, progress_callback=None):
+        """
+        Importa uma planilha em blocos, informando o progresso; usado pela interface em segundo plano.
+        :param append: Adiciona à partição existente em vez de substituí-la.
+        :param progress_callback: Função chamada com (linhas processadas, total estimado).
+        """
+        try:
+            logging.info(f"Importando dados do arquivo: {file_path}")
+            data = self.importer.import_financial_data_streaming(file_path, data_type, selected_date,
+                                                                 progress_callback=progress_callback, append=append)
+            if data is not None:
+                logging.info(f"Dados de {data_type} importados com sucesso para {selected_date}.")
+                return True
+            logging.warning(f"Falha ao importar dados de {data_type}.")
+            return False
+        except Exception as e:
+            logging.error(f"Erro ao importar dados: {e}")
+            return False
+
+    def analyze_financial_data(self, months=6, progress_callback=None):
+        """
+        Resumo mensal de custos, receitas, resultado e tendência linear do resultado.
+        :param months: Quantidade de meses mais recentes incluídos.
+        :param progress_callback: Função chamada com (etapas concluídas, total de etapas).
+        :return: DataFrame com as colunas 'Mes', 'Custos', 'Receitas', 'Resultado' e 'Tendência',
+                 indexado a partir de 1, ou None se não houver dados.
+        """
+        import numpy as np
+        import pandas as pd
+        from ForecastEngine import fit_linear_trends, predict_linear_trends
+
+        def monthly(cube):
+            if cube is None or 'Mes' not in cube.dimensions:
+                return pd.Series(dtype=float)
+            return cube.monthly()
+
+        try:
+            totals = {}
+            for step, (column, data_type) in enumerate((("Custos", "custos"), ("Receitas", "receitas")), start=1):
+                # Cubo reaproveitado entre chamadas enquanto as partições não mudam
+                totals[column] = monthly(self.data_reader.read_cube(data_type))
+                if progress_callback:
+                    progress_callback(step, 3)
+
+            summary = pd.DataFrame(totals).fillna(0).sort_index().tail(months)
+            if summary.empty:
+                return None
+            summary["Resultado"] = summary["Receitas"] - summary["Custos"]
+            slope, intercept, _ = fit_linear_trends(summary["Resultado"].values)
+            summary["Tendência"] = predict_linear_trends(slope, intercept, np.arange(len(summary)))[:, 0].round(2)
+
+            summary = summary.rename_axis("Mes").reset_index()
+            summary["Mes"] = summary["Mes"].astype(str)
+            summary.index = range(1, len(summary) + 1)
+            if progress_callback:
+                progress_callback(3, 3)
+            return summary
+        except Exception as e:
+            logging.error(f"Erro ao resumir dados financeiros: {e}")
+            return None
+
     def analyze_financials(self, start_date=None, end_date=None):
         """
         Realiza análise financeira no intervalo especificado.
@@ -47,11 +154,16 @@ class ApplicationController:
         :return: Resultados de análise financeira.
         """
         try:
-            custos_data = self.data_reader.read_data_by_date("custos", start_date, end_date)
-            receitas_data = self.data_reader.read_data_by_date("receitas", start_date, end_date)
+            import pandas as pd
 
-            growth_costs = self.processor.calculate_growth_indices(custos_data, "custos")
-            growth_revenues = self.processor.calculate_growth_indices(receitas_data, "receitas")
+            def growth(data_type):
+                cube = self.data_reader.read_cube(data_type, start_date, end_date)
+                if cube is None:
+                    return pd.Series(dtype=float)
+                return self.processor.calculate_growth_indices(cube, data_type)
+
+            growth_costs = growth("custos")
+            growth_revenues = growth("receitas")
 
             return {
                 "Crescimento Custos": growth_costs,
@@ -61,6 +173,24 @@ class ApplicationController:
             logging.error(f"Erro ao realizar análise financeira: {e}")
             return None
 
+    def get_profitability(self, month="*"):
+        """
+        Rentabilidade a partir dos totais acumulados, sem reler as partições.
+        :param month: Mês no formato "yyyy-MM" ou "*" para todo o histórico.
+        """
+        try:
+            return self.running_totals.profitability(month)
+        except Exception as e:
+            logging.error(f"Erro ao consultar rentabilidade: {e}")
+            return None
+
+    def current_balance(self):
+        """
+        Saldo atual (receitas menos custos de todo o histórico).
+        """
+        profitability = self.get_profitability()
+        return None if profitability is None else profitability['Lucro']
+
     def forecast_financials(self):
         """
         Realiza previsão financeira com base nos dados armazenados.
@@ -90,15 +220,32 @@ class ApplicationController:
             logging.error(f"Erro ao limpar dados: {e}")
             return False
 
-    def start_security_monitor(self):
+    def start_security_monitor(self, checks=None):
         """
         Inicia o monitoramento de segurança para proteger os dados.
+        :param checks: Verificações adicionais, executadas pelo mesmo agendador do monitor (sem
+                       novas threads): lista de dicionários com name, function, interval e,
+                       opcionalmente, jitter.
         """
         try:
+            for check in checks or []:
+                self.security_monitor.scheduler.add(**check)
             self.security_monitor.monitor()
         except Exception as e:
             logging.error(f"Erro ao iniciar o monitoramento de segurança: {e}")
 
+    def stop_security_monitor(self, timeout=10.0):
+        """
+        Encerra o monitoramento de segurança, aguardando a verificação em andamento.
+        """
+        if "security_monitor" not in self._modules:
+            return True
+        try:
+            return self.security_monitor.stop(timeout)
+        except Exception as e:
+            logging.error(f"Erro ao encerrar o monitoramento de segurança: {e}")
+            return False
+
 # Exemplo de uso
 if __name__ == "__main__":
     encryption_key = b"sua-chave-aqui"
@@ -0,0 +1,134 @@
+import logging
+import threading
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+class TaskCancelled(Exception):
+    """
+    Interrompe uma tarefa em segundo plano a pedido do usuário.
+    """
+
+class TaskSignals(QObject):
+    # Criados na thread da interface: os sinais emitidos pelo worker são entregues nela
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+class BackgroundTask(QRunnable):
+    def __init__(self, function, *args, **kwargs):
+        """
+        Executa uma função em um worker do QThreadPool.
+        A função recebe progress_callback=(processados, total); chamá-lo após um cancelamento
+        interrompe a tarefa com TaskCancelled.
+        :param function: Função executada fora da thread da interface.
+        """
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self._cancelled = threading.Event()
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        """
+        Solicita o cancelamento; o resultado de uma tarefa cancelada é descartado.
+        """
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def report_progress(self, processed, total):
+        if self.is_cancelled():
+            raise TaskCancelled()
+        self.signals.progress.emit(int(processed), int(total))
+
+    def run(self):
+        try:
+            result = self.function(*self.args, progress_callback=self.report_progress, **self.kwargs)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as e:
+            logging.error(f"Erro em tarefa em segundo plano: {e}")
+            self.signals.failed.emit(str(e))
+            return
+
+        # Cancelamentos sem ponto de verificação também descartam o resultado
+        if self.is_cancelled():
+            self.signals.cancelled.emit()
+        else:
+            self.signals.finished.emit(result)
+
+class TaskRunner:
+    def __init__(self, max_threads=2):
+        """
+        Agenda tarefas em segundo plano, mantendo no máximo uma em andamento por chave:
+        iniciar uma nova tarefa com a mesma chave cancela a anterior.
+        :param max_threads: Quantidade máxima de workers simultâneos.
+        """
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_threads)
+        self.tasks = {}
+        # Referências às tarefas em execução, incluindo as substituídas, até que terminem
+        self._running = set()
+        # Callbacks aguardando que nenhuma tarefa esteja em execução
+        self._idle_callbacks = []
+
+    def start(self, key, function, *args, on_result=None, on_progress=None, on_error=None, on_cancel=None,
+              **kwargs):
+        """
+        Inicia uma tarefa; os callbacks são executados na thread da interface.
+        :return: Tarefa iniciada (use cancel() para interrompê-la).
+        """
+        previous = self.tasks.get(key)
+        if previous is not None:
+            previous.cancel()
+
+        task = BackgroundTask(function, *args, **kwargs)
+        for signal, callback in ((task.signals.finished, on_result), (task.signals.progress, on_progress),
+                                 (task.signals.failed, on_error), (task.signals.cancelled, on_cancel)):
+            if callback is not None:
+                signal.connect(callback)
+        for signal in (task.signals.finished, task.signals.failed, task.signals.cancelled):
+            signal.connect(lambda *_, key=key, task=task: self._release(key, task))
+
+        self.tasks[key] = task
+        self._running.add(task)
+        self.pool.start(task)
+        return task
+
+    def _release(self, key, task):
+        self._running.discard(task)
+        if self.tasks.get(key) is task:
+            del self.tasks[key]
+        if not self._running:
+            callbacks, self._idle_callbacks = self._idle_callbacks, []
+            for callback in callbacks:
+                callback()
+
+    def cancel_all(self):
+        """
+        Solicita o cancelamento de todas as tarefas, sem aguardar: uma tarefa só para no próximo
+        ponto de verificação (use when_idle para agir depois que todas terminarem).
+        """
+        for task in list(self._running):
+            task.cancel()
+
+    def when_idle(self, callback):
+        """
+        Executa o callback, na thread da interface, assim que nenhuma tarefa estiver em execução
+        (imediatamente, se já não houver nenhuma).
+        """
+        if self._running:
+            self._idle_callbacks.append(callback)
+        else:
+            callback()
+
+    def shutdown(self, timeout_ms=5000):
+        """
+        Cancela as tarefas e aguarda os workers terminarem.
+        """
+        self.cancel_all()
+        return self.pool.waitForDone(timeout_ms)
@@ -0,0 +1,240 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import datetime, timezone
+import pandas as pd
+from cryptography.fernet import Fernet
+import SyntheticData
+from ExcelImporter import ExcelImporter
+from DataReader import DataReader
+from DatabaseConnector import DatabaseConnector
+from FinancialAnalyzer import FinancialAnalyzer
+from FinancialProcessor import FinancialProcessor
+from SecurityMonitor import SecurityMonitor
+from AggregateCube import AggregateCube
+
+# Suíte de benchmarks de ponta a ponta sobre dados sintéticos (SyntheticData), com vazão e
+# pico de memória de cada etapa gravados em um JSON de referência comparável entre versões.
+# Execute com: python BenchmarkSuite.py --rows 1000000 --output baseline.json
+# e, em outra versão: python BenchmarkSuite.py --rows 1000000 --compare baseline.json
+
+# Etapas cujo tempo ou pico de memória cresce acima desta fração são consideradas regressões
+DEFAULT_TOLERANCE = 0.2
+# Diferenças de tempo menores que isto (s) são ruído de medição, não regressão
+MIN_SECONDS = 0.05
+
+# Planilhas e inserções linha a linha são muito mais lentas que o restante: limites padrão
+DEFAULT_EXCEL_ROWS = 50000
+DEFAULT_INSERT_ROWS = 100000
+
+def measure(name, function, rows, trace_memory=True):
+    """
+    Executa uma etapa medindo tempo e pico de memória alocada (tracemalloc, que inclui os
+    arrays do numpy/pandas). Com trace_memory, os tempos incluem a sobrecarga do rastreamento.
+    :param name: Nome da etapa no relatório.
+    :param function: Função sem argumentos.
+    :param rows: Quantidade de linhas processadas, usada no cálculo da vazão.
+    :return: Tupla (resultado da função, dicionário de medidas).
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = function()
+    finally:
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+    return result, {
+        "etapa": name,
+        "linhas": rows,
+        "segundos": round(seconds, 4),
+        "linhas_por_segundo": round(rows / seconds) if seconds > 0 else None,
+        "pico_memoria_mb": round(peak / 1024 ** 2, 2) if peak is not None else None,
+    }
+
+def _version():
+    """
+    Commit atual do repositório, para identificar a versão medida.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except Exception:
+        return None
+
+def _database_rows(df):
+    return [{"fornecedor": row.Fornecedor, "data_pagamento": row.Data.strftime("%Y-%m-%d"),
+             "valor": row.Valor, "categoria": row.Categoria}
+            for row in df.rename(columns={"Data Pagamento": "Data"}).itertuples(index=False)]
+
+def run_suite(rows=1000000, excel_rows=DEFAULT_EXCEL_ROWS, insert_rows=DEFAULT_INSERT_ROWS, seed=42,
+              trace_memory=True):
+    """
+    Executa todas as etapas em um diretório temporário e retorna o relatório.
+    :param rows: Linhas geradas para leitura de partições, banco (carga em lote) e análises.
+    :param excel_rows: Linhas da planilha importada pelo ExcelImporter.
+    :param insert_rows: Linhas inseridas com insert_data (carga linha a linha em dicionários).
+    :param seed: Semente dos dados sintéticos.
+    :param trace_memory: Mede o pico de memória de cada etapa.
+    :return: Dicionário com a versão, o ambiente e a lista de resultados por etapa.
+    """
+    results = []
+
+    def step(name, function, count):
+        result, measures = measure(name, function, count, trace_memory)
+        results.append(measures)
+        return result
+
+    encryption_key = Fernet.generate_key()
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as workspace:
+        # O monitor de segurança grava o log relativo ao diretório atual
+        os.chdir(workspace)
+        try:
+            storage_path = os.path.join(workspace, "data")
+
+            # Importação de planilha
+            excel_path = SyntheticData.write_excel(os.path.join(workspace, "custos.xlsx"), "custos",
+                                                   excel_rows, seed=seed)
+            importer = ExcelImporter(encryption_key, storage_path)
+            importer.autosave_pending = False
+            step("ExcelImporter.import_financial_data",
+                 lambda: importer.import_financial_data(excel_path, "custos", "2020-01"), excel_rows)
+
+            # Leitura das partições mensais, sem e com cache
+            partition_path = os.path.join(workspace, "particoes")
+            SyntheticData.write_partitions(ExcelImporter(encryption_key, partition_path), "custos", rows, seed=seed)
+            reader = DataReader(encryption_key, partition_path, cache=None)
+            step("DataReader.read_data_by_date", lambda: reader.read_data_by_date("custos"), rows)
+            cached_reader = DataReader(encryption_key, partition_path)
+            cached_reader.read_data_by_date("custos")
+            step("DataReader.read_data_by_date (cache)", lambda: cached_reader.read_data_by_date("custos"), rows)
+            step("DataReader.read_cube", lambda: cached_reader.read_cube("custos"), rows)
+            step("DataReader.read_cube (cache)", lambda: cached_reader.read_cube("custos"), rows)
+
+            # Banco de dados
+            costs = SyntheticData.generate("custos", rows, seed=seed)
+            with DatabaseConnector(os.path.join(workspace, "app_data.db")) as db:
+                insert_data = _database_rows(costs.head(insert_rows))
+                step("DatabaseConnector.insert_data", lambda: db.insert_data("custos", insert_data), len(insert_data))
+                db.clear_table("custos")
+                step("DatabaseConnector.bulk_load", lambda: db.bulk_load("custos", costs), rows)
+                step("DatabaseConnector.fetch_data", lambda: db.fetch_data("custos"), rows)
+                step("DatabaseConnector.fetch_range", lambda: db.fetch_range("custos", "2021-01", "2021-12"), rows)
+                step("DatabaseConnector.monthly_totals", lambda: db.monthly_totals("custos", by_category=True), rows)
+            del costs
+
+            # Análises sobre custos e receitas combinados
+            combined = SyntheticData.generate_combined(rows, seed=seed)
+            categories = combined["Categoria"].cat.categories
+            cube = step("AggregateCube", lambda: AggregateCube(combined), rows)
+
+            analyzer = FinancialAnalyzer()
+            # Todos os fornecedores classificados, para que nenhuma pergunta seja feita ao usuário
+            analyzer.user_defined_keywords = {name.lower(): "Operacional" for name, _, _ in SyntheticData.SUPPLIERS}
+            analyzer.budget_targets = {category: 1000000.0 for category in categories}
+            costs = combined[combined["Tipo"] == "Custo"].copy()
+            step("FinancialAnalyzer.classify_costs", lambda: analyzer.classify_costs(costs), len(costs))
+            for method in ("analyze_profitability", "identify_leaders", "detect_trends", "forecast", "analyze_budget"):
+                step(f"FinancialAnalyzer.{method}", lambda: getattr(analyzer, method)(combined), rows)
+            step("FinancialAnalyzer.analyze_profitability (cubo)", lambda: analyzer.analyze_profitability(cube), rows)
+
+            processor = FinancialProcessor()
+            processor.budget_targets = dict(analyzer.budget_targets)
+            step("FinancialProcessor.calculate_growth_indices",
+                 lambda: processor.calculate_growth_indices(costs, "custos"), len(costs))
+            for method in ("analyze_budget", "forecast_cash_flow"):
+                step(f"FinancialProcessor.{method}", lambda: getattr(processor, method)(combined), rows)
+            del combined, costs, cube
+
+            # Varreduras de integridade sobre as partições gravadas
+            files = sum(len(names) for _, _, names in os.walk(partition_path))
+            full_monitor = SecurityMonitor([partition_path], incremental=False)
+            step("SecurityMonitor.scan (completa)", full_monitor.scan, files)
+            full_monitor.event_log.close()
+            monitor = SecurityMonitor([partition_path], signing_key=encryption_key)
+            step("SecurityMonitor.scan (inicial)", monitor.scan, files)
+            step("SecurityMonitor.scan (incremental)", monitor.scan, files)
+            monitor.event_log.close()
+        finally:
+            os.chdir(working_directory)
+
+    return {
+        "versao": _version(),
+        "data_hora": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "linhas": rows,
+        "resultados": results,
+    }
+
+def save_baseline(report, file_path):
+    with open(file_path, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+def compare(report, baseline_path, tolerance=DEFAULT_TOLERANCE, min_seconds=MIN_SECONDS):
+    """
+    Compara o relatório com um JSON de referência gravado anteriormente.
+    :param tolerance: Aumento relativo de tempo ou memória aceito antes de apontar regressão.
+    :param min_seconds: Aumento absoluto de tempo abaixo do qual não há regressão de tempo.
+    :return: DataFrame com os tempos, a memória e as razões (atual / referência) por etapa.
+    """
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    if baseline.get("linhas") != report["linhas"]:
+        logging.warning(f"Referência medida com {baseline.get('linhas')} linhas; atual com {report['linhas']}.")
+
+    previous = {result["etapa"]: result for result in baseline["resultados"]}
+    rows = []
+    for result in report["resultados"]:
+        reference = previous.get(result["etapa"])
+        if reference is None:
+            continue
+        time_ratio = result["segundos"] / reference["segundos"] if reference["segundos"] else None
+        slower = time_ratio is not None and time_ratio > 1 + tolerance \
+            and result["segundos"] - reference["segundos"] >= min_seconds
+        memory_ratio = (result["pico_memoria_mb"] / reference["pico_memoria_mb"]
+                        if result["pico_memoria_mb"] is not None and reference.get("pico_memoria_mb") else None)
+        rows.append({
+            "etapa": result["etapa"],
+            "segundos (ref.)": reference["segundos"],
+            "segundos": result["segundos"],
+            "razão tempo": round(time_ratio, 2) if time_ratio is not None else None,
+            "memória MB (ref.)": reference.get("pico_memoria_mb"),
+            "memória MB": result["pico_memoria_mb"],
+            "razão memória": round(memory_ratio, 2) if memory_ratio is not None else None,
+            "regressão": slower or (memory_ratio is not None and memory_ratio > 1 + tolerance),
+        })
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de ponta a ponta com dados sintéticos.")
+    parser.add_argument("--rows", type=int, default=1000000, help="Linhas geradas (10 mil a 10 milhões).")
+    parser.add_argument("--excel-rows", type=int, default=DEFAULT_EXCEL_ROWS, help="Linhas da planilha importada.")
+    parser.add_argument("--insert-rows", type=int, default=DEFAULT_INSERT_ROWS, help="Linhas inseridas com insert_data.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true", help="Não mede memória (tempos sem sobrecarga).")
+    parser.add_argument("--output", help="Grava o relatório JSON neste arquivo.")
+    parser.add_argument("--compare", help="JSON de referência para comparar.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    report = run_suite(args.rows, args.excel_rows, args.insert_rows, args.seed, not args.no_memory)
+    print(pd.DataFrame(report["resultados"]).to_string(index=False))
+    if args.output:
+        save_baseline(report, args.output)
+    if args.compare:
+        comparison = compare(report, args.compare, args.tolerance)
+        print(comparison.to_string(index=False))
+        sys.exit(1 if comparison["regressão"].any() else 0)
@@ -0,0 +1,295 @@
+import os
+import sys
+import time
+import statistics
+import subprocess
+import json
+import logging
+import tempfile
+import random
+import pandas as pd
+from cryptography.fernet import Fernet
+from DataReader import DataReader
+from FinancialAnalyzer import FinancialAnalyzer
+from ForecastEngine import ForecastEngine
+
+# Benchmarks dos caminhos críticos de desempenho.
+# Execute com: python Benchmarks.py
+
+# Orçamento de inicialização (ms) de cada ponto de entrada, medido em um processo novo:
+# importação do módulo e, para a interface, importação mais construção da janela principal
+STARTUP_BUDGET_MS = {
+    "ApplicationController": 150,
+    "AppUi": 400,
+    "AppUi (janela)": 500,
+}
+
+_WINDOW_STARTUP_SCRIPT = """
+import sys, time, tempfile
+start = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+from AppUi import MainWindow
+from ApplicationController import ApplicationController
+app = QApplication(sys.argv)
+window = MainWindow(ApplicationController(b"chave", tempfile.mkdtemp()))
+print((time.perf_counter() - start) * 1000)
+"""
+
+def _write_partitions(storage_path, encryption_key, data_type, partitions, rows_per_partition):
+    """
+    Cria partições mensais criptografadas sintéticas no formato do ExcelImporter.
+    """
+    fernet = Fernet(encryption_key)
+    for index in range(partitions):
+        year, month = 2000 + index // 12, index % 12 + 1
+        selected_date = f"{year}-{month:02d}"
+        df = pd.DataFrame({
+            "Fornecedor": [f"Fornecedor {i % 50}" for i in range(rows_per_partition)],
+            "Data Pagamento": [f"{selected_date}-{i % 28 + 1:02d}" for i in range(rows_per_partition)],
+            "Valor": [float(i % 1000) for i in range(rows_per_partition)],
+            "Categoria": [f"Categoria {i % 8}" for i in range(rows_per_partition)],
+        })
+        encrypted_data = fernet.encrypt(df.to_json(orient='records').encode()).decode()
+        with open(os.path.join(storage_path, f"{data_type}_{selected_date}.json"), 'w') as f:
+            json.dump({"data": encrypted_data}, f)
+
+def _read_serial_concat(reader, data_type):
+    """
+    Reproduz a leitura original: uma partição por vez, com pd.concat dentro do laço.
+    """
+    combined_data = pd.DataFrame()
+    for file_name in sorted(os.listdir(reader.storage_path)):
+        if file_name.startswith(data_type):
+            data = reader.load_encrypted_data(os.path.join(reader.storage_path, file_name))
+            combined_data = pd.concat([combined_data, data], ignore_index=True)
+    return combined_data
+
+def benchmark_read_data_by_date(partition_counts=(12, 60, 120), rows_per_partition=2000, max_workers=None):
+    """
+    Compara a leitura serial original com o carregamento paralelo de partições.
+    :return: Lista de dicionários com os tempos de cada cenário.
+    """
+    results = []
+    encryption_key = Fernet.generate_key()
+    for partitions in partition_counts:
+        with tempfile.TemporaryDirectory() as storage_path:
+            _write_partitions(storage_path, encryption_key, "custos", partitions, rows_per_partition)
+            # Leitores sem cache: cada braço descriptografa todas as partições
+            serial_reader = DataReader(encryption_key, storage_path, cache=None)
+            parallel_reader = DataReader(encryption_key, storage_path, max_workers=max_workers, cache=None)
+
+            start = time.perf_counter()
+            serial = _read_serial_concat(serial_reader, "custos")
+            serial_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            parallel = parallel_reader.read_data_by_date("custos")
+            parallel_time = time.perf_counter() - start
+
+            assert len(serial) == len(parallel) == partitions * rows_per_partition
+            results.append({
+                "partições": partitions,
+                "serial (s)": round(serial_time, 3),
+                "paralelo (s)": round(parallel_time, 3),
+                "aceleração": round(serial_time / parallel_time, 2) if parallel_time > 0 else None,
+            })
+    return results
+
+def _classify_costs_loop(analyzer, fornecedores):
+    """
+    Reproduz a classificação original: laço sobre todas as palavras-chave para cada linha.
+    """
+    categories = []
+    for fornecedor in fornecedores:
+        category = None
+        for keyword in analyzer.investment_keywords:
+            if keyword.lower() in fornecedor.lower():
+                category = 'Investimento'
+                break
+        if category is None:
+            for keyword, value in analyzer.user_defined_keywords.items():
+                if keyword.lower() in fornecedor.lower():
+                    category = value
+                    break
+        categories.append(category)
+    return categories
+
+def benchmark_classify_costs(keywords=10000, rows=1000000, unique_suppliers=5000, loop_sample=2000, seed=42):
+    """
+    Compara a classificação por autômato com o laço original sobre palavras-chave.
+    O laço original é medido em uma amostra de linhas e extrapolado para o total.
+    :return: Dicionário com os tempos medidos.
+    """
+    rng = random.Random(seed)
+    analyzer = FinancialAnalyzer()
+    analyzer.user_defined_keywords = {f"fornecedor{i:05d}": rng.choice(["Operacional", "Investimento"])
+                                      for i in range(keywords)}
+
+    suppliers = [f"Fornecedor{rng.randrange(keywords):05d} Filial {i}" for i in range(unique_suppliers)]
+    df = pd.DataFrame({"Fornecedor": [suppliers[rng.randrange(unique_suppliers)] for _ in range(rows)]})
+
+    start = time.perf_counter()
+    analyzer.classify_costs(df)
+    matcher_time = time.perf_counter() - start
+
+    sample = df['Fornecedor'].iloc[:loop_sample].tolist()
+    start = time.perf_counter()
+    expected = _classify_costs_loop(analyzer, sample)
+    loop_time = (time.perf_counter() - start) * rows / len(sample)
+
+    assert expected == df['Categoria'].iloc[:loop_sample].tolist()
+    return {
+        "palavras-chave": keywords,
+        "linhas": rows,
+        "autômato (s)": round(matcher_time, 3),
+        "laço original estimado (s)": round(loop_time, 1),
+        "aceleração": round(loop_time / matcher_time, 1) if matcher_time > 0 else None,
+    }
+
+def _forecast_loop(matrix, horizon):
+    """
+    Reproduz a previsão original: um LinearRegression do scikit-learn por série.
+    """
+    import numpy as np
+    from sklearn.linear_model import LinearRegression
+
+    forecasts = {}
+    x = np.arange(len(matrix)).reshape(-1, 1)
+    future_x = np.arange(len(matrix), len(matrix) + horizon).reshape(-1, 1)
+    for column in matrix.columns:
+        model = LinearRegression()
+        model.fit(x, matrix[column].values)
+        forecasts[column] = model.predict(future_x)
+    return forecasts
+
+def benchmark_forecast(series_counts=(100, 1000, 5000), months=60, horizon=3, seed=42):
+    """
+    Compara o ajuste vetorizado do ForecastEngine com um modelo do scikit-learn por série.
+    :return: Lista de dicionários com os tempos de cada cenário.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    results = []
+    for series in series_counts:
+        index = pd.period_range("2019-01", periods=months, freq="M")
+        trend = rng.normal(0, 50, series) * np.arange(months).reshape(-1, 1)
+        matrix = pd.DataFrame(1000 + trend + rng.normal(0, 100, (months, series)), index=index,
+                              columns=[f"Serie {i}" for i in range(series)])
+
+        start = time.perf_counter()
+        tidy = ForecastEngine(horizon=horizon).forecast_matrix(matrix)
+        engine_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = _forecast_loop(matrix, horizon)
+        loop_time = time.perf_counter() - start
+
+        first = tidy[tidy['Serie'] == matrix.columns[0]]['Previsao'].to_numpy()
+        assert np.allclose(first, expected[matrix.columns[0]])
+        results.append({
+            "séries": series,
+            "meses": months,
+            "vetorizado (s)": round(engine_time, 4),
+            "scikit-learn (s)": round(loop_time, 3),
+            "aceleração": round(loop_time / engine_time, 1) if engine_time > 0 else None,
+        })
+    return results
+
+def benchmark_chart_downsampling(point_counts=(100000, 1000000, 10000000), width=1200, seed=42):
+    """
+    Mede a redução de uma série à largura do gráfico (série completa e uma janela aproximada).
+    :return: Lista de dicionários com os tempos de cada método.
+    """
+    import numpy as np
+    from ChartSampler import SeriesDownsampler
+
+    rng = np.random.default_rng(seed)
+    results = []
+    for points in point_counts:
+        x = np.arange(points)
+        y = np.cumsum(rng.normal(size=points))
+        for method in SeriesDownsampler.METHODS:
+            sampler = SeriesDownsampler(x, y, method=method)
+
+            start = time.perf_counter()
+            sampled_x, _ = sampler.sample(width)
+            full_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            sampler.sample(width, points * 0.4, points * 0.6)
+            zoom_time = time.perf_counter() - start
+
+            results.append({
+                "pontos": points,
+                "método": method,
+                "pontos exibidos": len(sampled_x),
+                "série completa (ms)": round(full_time * 1000, 1),
+                "janela de 20% (ms)": round(zoom_time * 1000, 1),
+            })
+    return results
+
+def _run_entry_point(args):
+    """
+    Executa o Python em um processo novo, a partir do diretório do projeto.
+    """
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    return subprocess.run([sys.executable, *args], cwd=os.path.dirname(os.path.abspath(__file__)),
+                          capture_output=True, text=True, env=env, check=True)
+
+def _import_times(module):
+    """
+    Importa um módulo com python -X importtime e interpreta o relatório.
+    :return: Tupla (tempo cumulativo do módulo em ms, [(dependência direta, ms)] em ordem decrescente).
+    """
+    result = _run_entry_point(["-X", "importtime", "-c", f"import {module}"])
+    total = None
+    direct = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        milliseconds = int(cumulative) / 1000
+        if depth == 0 and name.strip() == module:
+            total = milliseconds
+        elif depth == 1:
+            direct.append((name.strip(), milliseconds))
+    return total, sorted(direct, key=lambda item: item[1], reverse=True)
+
+def benchmark_startup(runs=5, budget=STARTUP_BUDGET_MS):
+    """
+    Mede o tempo de inicialização dos pontos de entrada (mediana de várias execuções)
+    e compara com o orçamento.
+    :return: Lista de dicionários, um por ponto de entrada.
+    """
+    results = []
+    for module in ("ApplicationController", "AppUi"):
+        measurements = [_import_times(module) for _ in range(runs)]
+        median = statistics.median(total for total, _ in measurements)
+        results.append({
+            "ponto de entrada": module,
+            "mediana (ms)": round(median, 1),
+            "orçamento (ms)": budget[module],
+            "dentro do orçamento": median <= budget[module],
+            "mais lentas": ", ".join(f"{name} ({ms:.0f} ms)" for name, ms in measurements[-1][1][:3]),
+        })
+
+    window = [float(_run_entry_point(["-c", _WINDOW_STARTUP_SCRIPT]).stdout.split()[-1]) for _ in range(runs)]
+    median = statistics.median(window)
+    results.append({
+        "ponto de entrada": "AppUi (janela)",
+        "mediana (ms)": round(median, 1),
+        "orçamento (ms)": budget["AppUi (janela)"],
+        "dentro do orçamento": median <= budget["AppUi (janela)"],
+        "mais lentas": "",
+    })
+    return results
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    print(pd.DataFrame(benchmark_startup()).to_string(index=False))
+    print(pd.DataFrame(benchmark_read_data_by_date()).to_string(index=False))
+    print(benchmark_classify_costs())
+    print(pd.DataFrame(benchmark_forecast()).to_string(index=False))
+    print(pd.DataFrame(benchmark_chart_downsampling()).to_string(index=False))
@@ -0,0 +1,102 @@
+import numpy as np
+
+# Redução de séries para exibição: o gráfico recebe no máximo alguns pontos por pixel,
+# independentemente do tamanho do histórico.
+
+def lttb_downsample(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: escolhe, em cada intervalo, o ponto que forma o maior
+    triângulo com o ponto anterior escolhido e a média do intervalo seguinte, preservando
+    a forma visual da série.
+    :param x: Posições, em ordem crescente.
+    :param y: Valores.
+    :param threshold: Quantidade de pontos resultantes (inclui o primeiro e o último).
+    :return: Tupla (x, y) reduzida.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(max(int((bucket + 2) * every) + 1, end + 1), n)
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+
+        area = np.abs((x[selected] - average_x) * (y[start:end] - y[selected])
+                      - (x[selected] - x[start:end]) * (average_y - y[selected]))
+        selected = start + int(area.argmax())
+        indices[bucket + 1] = selected
+    return x[indices], y[indices]
+
+def min_max_downsample(x, y, buckets):
+    """
+    Mantém o menor e o maior valor de cada intervalo, na ordem original. Mais rápido que o
+    LTTB e preserva todos os picos.
+    :return: Tupla (x, y) com até 2 pontos por intervalo.
+    """
+    n = len(x)
+    if buckets < 1 or n <= 2 * buckets:
+        return x, y
+
+    size = -(-n // buckets)
+    full = n // size * size
+    blocks = y[:full].reshape(-1, size)
+    offsets = np.arange(0, full, size)
+    indices = [offsets + blocks.argmin(axis=1), offsets + blocks.argmax(axis=1)]
+    if full < n:
+        tail = y[full:]
+        indices.append(np.array([full + tail.argmin(), full + tail.argmax()]))
+    indices = np.unique(np.concatenate(indices))
+    return x[indices], y[indices]
+
+class SeriesDownsampler:
+    METHODS = {"lttb": lttb_downsample, "minmax": min_max_downsample}
+
+    def __init__(self, x, y, method="lttb"):
+        """
+        Guarda a série completa e fornece versões reduzidas da janela visível.
+        :param x: Posições dos pontos.
+        :param y: Valores; ausentes são descartados.
+        :param method: "lttb" (forma visual) ou "minmax" (picos, mais rápido).
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Método de redução desconhecido: {method}")
+        self.method = method
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        order = np.argsort(x[valid], kind='stable')
+        self.x = x[valid][order]
+        self.y = y[valid][order]
+
+    def __len__(self):
+        return len(self.x)
+
+    def bounds(self):
+        """
+        Retorna (x mínimo, x máximo, y mínimo, y máximo), ou None para série vazia.
+        """
+        if not len(self.x):
+            return None
+        return self.x[0], self.x[-1], self.y.min(), self.y.max()
+
+    def sample(self, width, x_min=None, x_max=None):
+        """
+        Reduz a janela [x_min, x_max] para a largura do gráfico em pixels.
+        Um ponto de cada lado da janela é mantido para a linha continuar até a borda.
+        :return: Tupla (x, y).
+        """
+        start = 0 if x_min is None else max(int(np.searchsorted(self.x, x_min, side='left')) - 1, 0)
+        end = len(self.x) if x_max is None else min(int(np.searchsorted(self.x, x_max, side='right')) + 1, len(self.x))
+        x, y = self.x[start:end], self.y[start:end]
+
+        width = max(int(width), 2)
+        if self.method == "lttb":
+            return lttb_downsample(x, y, width)
+        return min_max_downsample(x, y, width // 2)
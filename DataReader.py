@@ -2,18 +2,162 @@ import os
 import logging
 import pandas as pd
 from cryptography.fernet import Fernet
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import OrderedDict
+from io import StringIO
+import threading
+import hashlib
 import json
+from PartitionManifest import PartitionManifest, PARTITION_PATTERN
+from AggregateCube import AggregateCube
+from DataSchema import SCHEMA_VERSION, decode_frame, normalize_frame, categorize, parse_dates
+
+# Tentativas de leitura quando uma compactação concorrente remove arquivos listados no manifesto
+READ_ATTEMPTS = 3
+
+def _decrypt_partition(encryption_key, file_path):
+    """
+    Descriptografa e interpreta um arquivo de partição.
+    Função de módulo para poder ser executada também em um pool de processos.
+    Partições gravadas antes do esquema tipado são convertidas na leitura.
+    """
+    with open(file_path, 'r') as f:
+        envelope = json.load(f)
+    fernet = Fernet(encryption_key)
+    decrypted_data = fernet.decrypt(envelope["data"].encode()).decode()
+    if envelope.get("esquema") == SCHEMA_VERSION:
+        return decode_frame(pd.read_json(StringIO(decrypted_data), dtype=False, convert_dates=False))
+    return normalize_frame(pd.read_json(StringIO(decrypted_data)))
+
+class PartitionCache:
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        """
+        Cache LRU em memória de partições já descriptografadas.
+        As entradas são validadas pelo mtime e tamanho do arquivo, então uma partição
+        regravada nunca é servida desatualizada, e separadas pela chave de criptografia, então
+        um leitor nunca recebe partições descriptografadas com a chave de outro.
+        :param max_bytes: Orçamento de memória (bytes) ocupado pelos DataFrames em cache.
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(file_path, encryption_key):
+        # Apenas um resumo da chave fica em memória, junto com o caminho absoluto
+        key_bytes = encryption_key.encode() if isinstance(encryption_key, str) else encryption_key
+        return os.path.abspath(file_path), hashlib.blake2b(key_bytes, digest_size=16).digest()
+
+    def get(self, file_path, encryption_key, copy=True):
+        """
+        Retorna a partição em cache, ou None se ausente ou desatualizada.
+        :param encryption_key: Chave com que a partição foi descriptografada.
+        :param copy: Retorna uma cópia, protegendo o cache de alterações do chamador.
+        """
+        key = self._key(file_path, encryption_key)
+        try:
+            stat = os.stat(key[0])
+        except OSError:
+            self.invalidate(file_path)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != (stat.st_mtime_ns, stat.st_size):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            df = entry[1]
+        return df.copy() if copy else df
+
+    def put(self, file_path, encryption_key, df, signature=None):
+        """
+        Armazena uma partição, removendo as menos usadas se o orçamento for excedido.
+        :param encryption_key: Chave com que a partição foi descriptografada.
+        :param signature: Tupla (mtime_ns, tamanho) lida antes do carregamento (opcional).
+        """
+        key = self._key(file_path, encryption_key)
+        if signature is None:
+            try:
+                stat = os.stat(key[0])
+            except OSError:
+                return
+            signature = (stat.st_mtime_ns, stat.st_size)
+
+        nbytes = int(df.memory_usage(deep=True).sum())
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (signature, df, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, file_path=None):
+        """
+        Remove uma partição do cache (com qualquer chave), ou todas se nenhum caminho for informado.
+        """
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                self.current_bytes = 0
+                return
+            path = os.path.abspath(file_path)
+            for key in [key for key in self._entries if key[0] == path]:
+                self._remove(key)
+
+    def stats(self):
+        """
+        Retorna contadores de uso do cache.
+        """
+        with self._lock:
+            return {"acertos": self.hits, "falhas": self.misses, "entradas": len(self._entries),
+                    "bytes": self.current_bytes, "limite_bytes": self.max_bytes}
+
+    def _remove(self, key):
+        _, _, nbytes = self._entries.pop(key)
+        self.current_bytes -= nbytes
+
+# Cache compartilhado entre leitores e o ExcelImporter, que o invalida ao gravar partições
+partition_cache = PartitionCache()
+
+def _file_signature(file_path):
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
 
 class DataReader:
-    def __init__(self, encryption_key, storage_path="utils/data/"):
+    def __init__(self, encryption_key, storage_path="utils/data/", max_workers=None, use_processes=False,
+                 cache=partition_cache, max_cubes=8):
         """
         Módulo para leitura e manipulação de dados armazenados.
         :param encryption_key: Chave de criptografia para os dados.
         :param storage_path: Caminho de armazenamento dos dados processados.
+        :param max_workers: Número máximo de partições carregadas em paralelo (padrão: núcleos disponíveis).
+        :param use_processes: Usa um pool de processos em vez de threads para carregar as partições.
+        :param cache: PartitionCache usado para evitar descriptografar a mesma partição novamente
+                      (None desativa o cache).
+        :param max_cubes: Quantidade de cubos de agregados mantidos por read_cube.
         """
         self.encryption_key = encryption_key
         self.storage_path = storage_path
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.cache = cache
+        self.max_cubes = max_cubes
+        self._cubes = OrderedDict()
+        self._cubes_lock = threading.Lock()
         os.makedirs(storage_path, exist_ok=True)
+        self.manifest = PartitionManifest(storage_path)
+        self.ensure_manifest()
 
     def load_encrypted_data(self, file_path):
         """
@@ -21,15 +165,27 @@ class DataReader:
         :param file_path: Caminho do arquivo.
         """
         try:
-            with open(file_path, 'r') as f:
-                encrypted_data = json.load(f)["data"]
-                fernet = Fernet(self.encryption_key)
-                decrypted_data = fernet.decrypt(encrypted_data.encode()).decode()
-                return pd.read_json(decrypted_data)
+            if self.cache is None:
+                return _decrypt_partition(self.encryption_key, file_path)
+
+            data = self.cache.get(file_path, self.encryption_key)
+            if data is None:
+                data = self._load_and_cache(file_path).copy()
+            return data
         except Exception as e:
             logging.error(f"Erro ao carregar dados do arquivo {file_path}: {e}")
             return pd.DataFrame()
 
+    def _load_and_cache(self, file_path):
+        """
+        Descriptografa uma partição e a armazena no cache, se habilitado.
+        """
+        signature = _file_signature(file_path)
+        data = _decrypt_partition(self.encryption_key, file_path)
+        if self.cache is not None:
+            self.cache.put(file_path, self.encryption_key, data, signature)
+        return data
+
     def read_data_by_date(self, data_type, start_date=None, end_date=None):
         """
         Lê dados de arquivos com base no tipo e intervalo de datas.
@@ -39,26 +195,186 @@ class DataReader:
         :return: DataFrame combinado contendo os dados dentro do intervalo.
         """
         try:
-            relevant_files = []
-            all_files = os.listdir(self.storage_path)
+            # Um arquivo listado que desaparece (compactação concorrente) leva a reler o manifesto,
+            # que já aponta para a nova geração, em vez de devolver dados incompletos
+            for _ in range(READ_ATTEMPTS):
+                try:
+                    return self.load_partitions(self._partition_paths(data_type, start_date, end_date),
+                                                missing_ok=False)
+                except FileNotFoundError as e:
+                    logging.info(f"Partição alterada durante a leitura ({e}); relendo o manifesto.")
+            raise RuntimeError(f"Partições de {data_type} alteradas em todas as {READ_ATTEMPTS} tentativas de leitura.")
+        except Exception as e:
+            logging.error(f"Erro ao ler dados por data: {e}")
+            return pd.DataFrame()
+
+    def read_cube(self, data_type, start_date=None, end_date=None):
+        """
+        Cubo de agregados (AggregateCube) das partições de um tipo no intervalo de meses,
+        reaproveitado entre análises enquanto os dados não mudarem. A versão dos dados é o
+        checksum de cada arquivo registrado no manifesto: gravações, adições e compactações
+        geram um novo cubo. O cubo retornado é compartilhado e não deve ser alterado.
+        :return: AggregateCube, ou None se não houver dados.
+        """
+        key = (data_type, start_date, end_date)
+        # A versão é lida antes dos dados: uma gravação no meio apenas descarta o cubo depois
+        version = self._dataset_version(data_type, start_date, end_date)
+        if version is not None:
+            with self._cubes_lock:
+                cached = self._cubes.get(key)
+                if cached is not None and cached[0] == version:
+                    self._cubes.move_to_end(key)
+                    return cached[1]
 
-            for file_name in all_files:
-                if file_name.startswith(data_type):
-                    file_date = file_name.split("_")[1].replace(".json", "")
-                    if (not start_date or file_date >= start_date) and (not end_date or file_date <= end_date):
-                        relevant_files.append(file_name)
+        data = self.read_data_by_date(data_type, start_date, end_date)
+        if data.empty or 'Valor' not in data.columns:
+            return None
+        cube = AggregateCube(data)
+        if version is not None:
+            with self._cubes_lock:
+                self._cubes[key] = (version, cube)
+                self._cubes.move_to_end(key)
+                while len(self._cubes) > self.max_cubes:
+                    self._cubes.popitem(last=False)
+        return cube
 
-            combined_data = pd.DataFrame()
+    def _dataset_version(self, data_type, start_date=None, end_date=None):
+        """
+        Checksums dos arquivos das partições selecionadas, ou None sem manifesto.
+        """
+        if not self.manifest.exists():
+            return None
+        return tuple((month, entry["checksum"], tuple(segment["checksum"] for segment in entry.get("segmentos", [])))
+                     for month, entry in self.manifest.select(data_type, start_date, end_date))
 
-            for file_name in relevant_files:
-                file_path = os.path.join(self.storage_path, file_name)
-                data = self.load_encrypted_data(file_path)
-                combined_data = pd.concat([combined_data, data], ignore_index=True)
+    def _partition_paths(self, data_type, start_date=None, end_date=None):
+        """
+        Caminhos dos arquivos (base e segmentos) das partições de um tipo no intervalo de meses.
+        """
+        if self.manifest.exists():
+            partitions = self.manifest.select(data_type, start_date, end_date)
+            file_names = [file_name for _, entry in partitions for file_name in PartitionManifest.files(entry)]
+        else:
+            # Diretório ainda sem nenhuma partição registrada: varredura
+            file_names = [file_name for month, file_name in self._scan_partitions(data_type)
+                          if (not start_date or month >= start_date) and (not end_date or month <= end_date)]
+        return [os.path.join(self.storage_path, file_name) for file_name in file_names]
 
-            return combined_data
-        except Exception as e:
-            logging.error(f"Erro ao ler dados por data: {e}")
+    def _scan_partitions(self, data_type=None):
+        """
+        Lista as partições do diretório cujo nome segue o padrão <tipo>_<yyyy-MM>.json.
+        :return: Lista ordenada de (mês, nome do arquivo); com data_type=None, inclui o tipo.
+        """
+        partitions = []
+        for file_name in os.listdir(self.storage_path):
+            match = PARTITION_PATTERN.match(file_name)
+            if not match:
+                continue
+            if data_type is None:
+                partitions.append((match.group(1), match.group(2), file_name))
+            elif match.group(1) == data_type:
+                partitions.append((match.group(2), file_name))
+        return sorted(partitions)
+
+    def ensure_manifest(self):
+        """
+        Cria o manifesto a partir das partições existentes se ele ainda não existir, para que
+        armazenamentos anteriores ao manifesto não percam partições na primeira gravação.
+        :return: False se o manifesto ausente não pôde ser reconstruído.
+        """
+        if self.manifest.exists() or not self._scan_partitions():
+            return True
+        logging.info("Manifesto de partições ausente; reconstruindo a partir do diretório.")
+        return self.rebuild_manifest()
+
+    def rebuild_manifest(self):
+        """
+        Reconstrói o manifesto a partir das partições existentes no diretório.
+        Todas as partições são registradas em uma única gravação: uma interrupção no meio
+        não deixa um manifesto parcial. Se alguma partição não puder ser lida (por exemplo,
+        com a chave errada), o manifesto não é gravado, para que ela não seja registrada vazia.
+        :return: True se o manifesto foi gravado.
+        """
+        records = []
+        for data_type, month, file_name in self._scan_partitions():
+            file_path = os.path.join(self.storage_path, file_name)
+            try:
+                data = _decrypt_partition(self.encryption_key, file_path)
+            except Exception as e:
+                logging.error(f"Manifesto não reconstruído: erro ao ler a partição {file_path}: {e}")
+                return False
+            dates = parse_dates(data['Data Pagamento']).dropna() \
+                if 'Data Pagamento' in data.columns else pd.Series(dtype='datetime64[ns]')
+            with open(file_path, 'rb') as f:
+                content = f.read()
+            records.append((
+                data_type, month, file_name, len(data),
+                dates.min().strftime('%Y-%m-%d') if not dates.empty else None,
+                dates.max().strftime('%Y-%m-%d') if not dates.empty else None,
+                len(content), hashlib.sha256(content).hexdigest()
+            ))
+        self.manifest.record_many(records)
+        logging.info("Manifesto de partições reconstruído com sucesso.")
+        return True
+
+    def load_partitions(self, file_paths, max_workers=None, missing_ok=True):
+        """
+        Carrega várias partições em paralelo e concatena o resultado uma única vez.
+        :param file_paths: Caminhos dos arquivos de partição, na ordem desejada.
+        :param max_workers: Limite de workers para esta chamada (padrão: self.max_workers).
+        :param missing_ok: Ignora arquivos inexistentes; com False, FileNotFoundError é propagado.
+        :return: DataFrame combinado; partições com erro são ignoradas.
+        """
+        if not file_paths:
+            return pd.DataFrame()
+
+        # Partições em cache não são copiadas: o concat final já gera um novo DataFrame
+        loaded = {}
+        if self.cache is not None:
+            for file_path in file_paths:
+                data = self.cache.get(file_path, self.encryption_key, copy=False)
+                if data is not None:
+                    loaded[file_path] = data
+        missing = [file_path for file_path in file_paths if file_path not in loaded]
+
+        workers = min(max_workers or self.max_workers, len(missing))
+        if workers <= 1:
+            for file_path in missing:
+                try:
+                    loaded[file_path] = self._load_and_cache(file_path)
+                except FileNotFoundError:
+                    if not missing_ok:
+                        raise
+                    logging.error(f"Arquivo de partição não encontrado: {file_path}")
+                except Exception as e:
+                    logging.error(f"Erro ao carregar dados do arquivo {file_path}: {e}")
+        else:
+            executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            with executor_class(max_workers=workers) as executor:
+                signatures = {}
+                futures = []
+                for file_path in missing:
+                    try:
+                        signatures[file_path] = _file_signature(file_path)
+                    except OSError:
+                        pass
+                    futures.append(executor.submit(_decrypt_partition, self.encryption_key, file_path))
+                for file_path, future in zip(missing, futures):
+                    try:
+                        loaded[file_path] = future.result()
+                        if self.cache is not None and file_path in signatures:
+                            self.cache.put(file_path, self.encryption_key, loaded[file_path], signatures[file_path])
+                    except FileNotFoundError:
+                        if not missing_ok:
+                            raise
+                        logging.error(f"Arquivo de partição não encontrado: {file_path}")
+                    except Exception as e:
+                        logging.error(f"Erro ao carregar dados do arquivo {file_path}: {e}")
+
+        frames = [loaded[file_path] for file_path in file_paths if file_path in loaded and not loaded[file_path].empty]
+        if not frames:
             return pd.DataFrame()
+        return categorize(pd.concat(frames, ignore_index=True))
 
     def analyze_data(self, combined_data):
         """
@@ -0,0 +1,168 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Esquema tipado dos dados financeiros, aplicado uma única vez na importação.
+# Em memória: 'Data Pagamento' como datetime64 (dia), 'Valor' em reais arredondado ao centavo
+# e colunas de nomes/categorias como category. Nas partições (versão 2): datas em dias
+# desde 1970-01-01 e valores em centavos inteiros.
+
+SCHEMA_VERSION = 2
+DATE_COLUMN = 'Data Pagamento'
+VALUE_COLUMN = 'Valor'
+CATEGORICAL_COLUMNS = ('Fornecedor', 'Cliente', 'Categoria', 'Tipo Programado', 'Tipo')
+
+# Datas exportadas no formato brasileiro, ex.: "05/01/2024" ou "5/1/2024 00:00"
+BRAZILIAN_DATE_PATTERN = re.compile(r"^\d{1,2}/\d{1,2}/\d{4}")
+EPOCH = pd.Timestamp("1970-01-01")
+
+# Datas numéricas: números de série do Excel (dias desde 1899-12-30) ou milissegundos desde
+# 1970 (formato gravado por to_json); faixas plausíveis de cada formato, sem sobreposição
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+EXCEL_SERIAL_RANGE = (1, 2958465)  # 1900-01-01 a 9999-12-31
+EPOCH_MS_RANGE = (1e10, 2.6e14)  # 1970-04-26 a 10000-01-01
+
+# Formatos aceitos para valores em texto (após remover "R$" e espaços). Uma vírgula seguida
+# de exatamente três dígitos, sem outro separador ("1,234"), é ambígua e rejeitada.
+MONEY_FORMATS = (
+    # (padrão, separador de milhar a remover, separador decimal)
+    (re.compile(r"-?\d+"), None, None),
+    (re.compile(r"-?\d{1,3}(?:\.\d{3})+"), ".", None),                 # 1.500 / 1.234.567
+    (re.compile(r"-?\d+\.\d+"), None, "."),                             # 10.50
+    (re.compile(r"-?(?:\d{1,3}(?:\.\d{3})+|\d+),\d+"), ".", ","),        # 1.234,56 / 10,5
+    (re.compile(r"-?\d{1,3}(?:,\d{3})+\.\d+"), ",", "."),                # 1,234.56
+    (re.compile(r"-?\d{1,3}(?:,\d{3}){2,}"), ",", None),                 # 1,234,567
+)
+AMBIGUOUS_MONEY_PATTERN = re.compile(r"-?\d{1,3},\d{3}")
+
+def parse_dates(values):
+    """
+    Converte datas em datetime64, truncadas no dia. Colunas já convertidas são devolvidas sem
+    nova interpretação; textos podem estar em ISO ("yyyy-MM-dd") ou no formato brasileiro
+    ("dd/mm/yyyy"). Números são números de série do Excel ou milissegundos (to_json), conforme
+    a faixa de valores da coluna.
+    :raises ValueError: Se uma coluna numérica não estiver inteiramente em uma das faixas.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return _parse_numeric_dates(values)
+
+    text = values.astype(str).str.strip()
+    brazilian = text.str.match(BRAZILIAN_DATE_PATTERN)
+    dates = pd.to_datetime(values.where(~brazilian), format='ISO8601', errors='coerce')
+    if brazilian.any():
+        dates[brazilian] = pd.to_datetime(text[brazilian].str.split().str[0], format='%d/%m/%Y', errors='coerce')
+    return dates.dt.normalize()
+
+def _parse_numeric_dates(values):
+    present = values.dropna()
+    if present.empty:
+        return pd.to_datetime(values, errors='coerce')
+    low, high = present.min(), present.max()
+    if EXCEL_SERIAL_RANGE[0] <= low and high <= EXCEL_SERIAL_RANGE[1]:
+        return (EXCEL_EPOCH + pd.to_timedelta(values, unit='D')).dt.normalize()
+    if EPOCH_MS_RANGE[0] <= low and high <= EPOCH_MS_RANGE[1]:
+        return pd.to_datetime(values, unit='ms').dt.normalize()
+    raise ValueError(f"Datas numéricas em formato desconhecido (de {low} a {high}): "
+                     "esperados números de série do Excel ou milissegundos.")
+
+def to_cents(values):
+    """
+    Converte valores monetários em centavos inteiros (Int64; ausentes permanecem nulos).
+    Aceita números e textos como "1.234,56", "R$ 1.500" (ponto de milhar), "10.50" ou "1,234.56".
+    :raises ValueError: Para textos ambíguos ("1,234") ou que não sejam valores monetários.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if not pd.api.types.is_numeric_dtype(values):
+        values = _parse_money(values)
+    return (values.astype('float64') * 100).round().astype('Int64')
+
+def _parse_money(values):
+    """
+    Interpreta textos monetários; números já presentes em colunas mistas são mantidos.
+    """
+    is_text = values.map(lambda value: isinstance(value, str))
+    parsed = pd.to_numeric(values.where(~is_text), errors='coerce').astype('float64')
+    if not is_text.any():
+        return parsed
+
+    text = values[is_text].str.replace(r"[R$\s\u00a0]", "", regex=True)
+    blank = text.eq("") | text.str.lower().isin(("nan", "none", "null"))
+    matched = blank.copy()
+    normalized = pd.Series(np.nan, index=text.index, dtype=object)
+    for pattern, thousands, decimal in MONEY_FORMATS:
+        match = ~matched & text.str.fullmatch(pattern) & ~text.str.fullmatch(AMBIGUOUS_MONEY_PATTERN)
+        if not match.any():
+            continue
+        current = text[match]
+        if thousands:
+            current = current.str.replace(thousands, "", regex=False)
+        if decimal == ",":
+            current = current.str.replace(",", ".", regex=False)
+        normalized[match] = current
+        matched |= match
+
+    if not matched.all():
+        examples = ", ".join(repr(value) for value in values[is_text][~matched].unique()[:5])
+        raise ValueError(f"Valores monetários ambíguos ou inválidos: {examples}")
+    parsed[is_text] = pd.to_numeric(normalized, errors='coerce')
+    return parsed
+
+def value_to_cents(value):
+    """
+    Converte um único valor monetário em centavos (int), ou None se ausente.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+        return None if value != value else int(round(float(value) * 100))
+    cents = to_cents(pd.Series([value], dtype=object)).iloc[0]
+    return None if pd.isna(cents) else int(cents)
+
+def from_cents(cents):
+    """
+    Converte centavos inteiros em reais (float64, ausentes como NaN).
+    """
+    return pd.Series(cents.to_numpy(dtype='float64', na_value=np.nan) / 100, index=cents.index)
+
+def categorize(df):
+    """
+    Converte as colunas de nomes e categorias em category (ex.: após um concat).
+    """
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    return df
+
+def normalize_frame(df):
+    """
+    Aplica o esquema tipado a um DataFrame (datas, valores ao centavo e categorias).
+    """
+    if DATE_COLUMN in df.columns:
+        df[DATE_COLUMN] = parse_dates(df[DATE_COLUMN])
+    if VALUE_COLUMN in df.columns:
+        df[VALUE_COLUMN] = from_cents(to_cents(df[VALUE_COLUMN]))
+    return categorize(df)
+
+def encode_frame(df):
+    """
+    Prepara um DataFrame tipado para gravação: datas em dias e valores em centavos.
+    """
+    encoded = df.copy(deep=False)
+    if DATE_COLUMN in encoded.columns:
+        encoded[DATE_COLUMN] = (parse_dates(encoded[DATE_COLUMN]) - EPOCH).dt.days.astype('Int64')
+    if VALUE_COLUMN in encoded.columns:
+        encoded[VALUE_COLUMN] = to_cents(encoded[VALUE_COLUMN])
+    return encoded
+
+def decode_frame(df):
+    """
+    Reconstrói o DataFrame tipado a partir do formato gravado (versão 2).
+    """
+    if DATE_COLUMN in df.columns:
+        df[DATE_COLUMN] = EPOCH + pd.to_timedelta(pd.to_numeric(df[DATE_COLUMN], errors='coerce'), unit='D')
+    if VALUE_COLUMN in df.columns:
+        df[VALUE_COLUMN] = pd.to_numeric(df[VALUE_COLUMN], errors='coerce') / 100
+    return categorize(df)
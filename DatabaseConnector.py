@@ -1,10 +1,159 @@
 import sqlite3
 import logging
 import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from itertools import islice, tee
+from RowFingerprint import fingerprint_keys, row_key, OccurrenceCounter, FINGERPRINT_VERSION
+from DataSchema import value_to_cents
 
 # Configuração de log
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Colunas de cada tabela, na ordem usada pelas inserções posicionais
+TABLE_COLUMNS = {
+    "custos": ("fornecedor", "data_pagamento", "valor", "categoria"),
+    "receitas": ("cliente", "data_pagamento", "valor", "categoria"),
+    "programados": ("descricao", "tipo", "data_prevista", "valor"),
+}
+
+# Nomes de colunas gerados pelo ExcelImporter e seus equivalentes no banco
+IMPORTER_COLUMN_ALIASES = {
+    "custos": {"Fornecedor": "fornecedor", "Data Pagamento": "data_pagamento", "Valor": "valor", "Categoria": "categoria"},
+    "receitas": {"Cliente": "cliente", "Data Pagamento": "data_pagamento", "Valor": "valor", "Categoria": "categoria"},
+    "programados": {"Descrição": "descricao", "Tipo Programado": "tipo", "Data Pagamento": "data_prevista", "Valor": "valor"},
+}
+
+# Campos de origem (contraparte, data, valor) que compõem a impressão digital de cada linha
+FINGERPRINT_FIELDS = {
+    "custos": ("fornecedor", "data_pagamento", "valor"),
+    "receitas": ("cliente", "data_pagamento", "valor"),
+    "programados": ("descricao", "data_prevista", "valor"),
+}
+
+# Colunas de data e de categoria usadas nas consultas por intervalo
+DATE_COLUMNS = {"custos": "data_pagamento", "receitas": "data_pagamento", "programados": "data_prevista"}
+CATEGORY_COLUMNS = {"custos": "categoria", "receitas": "categoria", "programados": "tipo"}
+
+# Definição das tabelas; 'valor' é gravado em centavos inteiros e lido em reais
+TABLE_SCHEMAS = {
+    "custos": "id INTEGER PRIMARY KEY AUTOINCREMENT, fornecedor TEXT, data_pagamento TEXT, "
+              "valor INTEGER, categoria TEXT, fingerprint TEXT",
+    "receitas": "id INTEGER PRIMARY KEY AUTOINCREMENT, cliente TEXT, data_pagamento TEXT, "
+                "valor INTEGER, categoria TEXT, fingerprint TEXT",
+    "programados": "id INTEGER PRIMARY KEY AUTOINCREMENT, descricao TEXT, tipo TEXT, data_prevista TEXT, "
+                   "valor INTEGER, fingerprint TEXT",
+}
+
+# Expressão que devolve 'valor' em reais nas consultas
+VALUE_IN_REAIS = "valor / 100.0"
+
+# Índices usados pelas consultas por período, categoria e contraparte
+TABLE_INDEXES = {
+    "custos": ("data_pagamento", "categoria", "fornecedor"),
+    "receitas": ("data_pagamento", "categoria", "cliente"),
+    "programados": ("data_prevista", "tipo"),
+}
+
+class _ThreadOwner:
+    """
+    Marcador guardado no armazenamento local da thread: é liberado quando a thread termina.
+    """
+    __slots__ = ("__weakref__",)
+
+class ConnectionManager:
+    def __init__(self, db_path, cache_size_kb=20000, mmap_size=268435456, busy_timeout=5.0):
+        """
+        Gerencia conexões SQLite persistentes, uma por thread.
+        Cada thread (UI, importação, análise) reutiliza a própria conexão em vez de abrir
+        e fechar uma nova a cada operação; a conexão é fechada quando a thread termina.
+        :param db_path: Caminho do arquivo do banco de dados.
+        :param cache_size_kb: Tamanho do cache de páginas por conexão, em KiB.
+        :param mmap_size: Tamanho máximo (bytes) do mapeamento de memória do arquivo.
+        :param busy_timeout: Tempo máximo (segundos) de espera por um lock de escrita.
+        """
+        self.db_path = db_path
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.busy_timeout = busy_timeout
+
+        self._local = threading.local()
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    def _open_connection(self):
+        """
+        Abre uma nova conexão e aplica os pragmas de desempenho.
+        """
+        connection = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False)
+        cursor = connection.cursor()
+        # WAL permite leituras concorrentes enquanto uma thread escreve
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        cursor.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+        with self._lock:
+            self._connections.add(connection)
+        return connection
+
+    @staticmethod
+    def _release(connections, lock, connection):
+        """
+        Fecha a conexão de uma thread encerrada (chamado quando o armazenamento local é liberado).
+        """
+        with lock:
+            connections.discard(connection)
+        try:
+            connection.close()
+        except Exception as e:
+            logging.error(f"Erro ao fechar conexão com o banco de dados: {e}")
+
+    def get_connection(self):
+        """
+        Retorna a conexão da thread atual, abrindo-a na primeira chamada.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._open_connection()
+            owner = _ThreadOwner()
+            weakref.finalize(owner, self._release, self._connections, self._lock, connection)
+            self._local.connection = connection
+            self._local.owner = owner
+        return connection
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager que fornece a conexão da thread atual.
+        Faz commit ao final do bloco ou rollback em caso de erro; a conexão permanece aberta.
+        """
+        connection = self.get_connection()
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+    def close_all(self):
+        """
+        Fecha todas as conexões abertas por qualquer thread.
+        """
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception as e:
+                logging.error(f"Erro ao fechar conexão com o banco de dados: {e}")
+        self._local = threading.local()
+
 class DatabaseConnector:
     def __init__(self, db_path="utils/data/app_data.db"):
         """
@@ -12,100 +161,344 @@ class DatabaseConnector:
         :param db_path: Caminho do arquivo do banco de dados.
         """
         self.db_path = db_path
-        self.connection = None
 
         # Criar diretório se necessário
         if not os.path.exists(os.path.dirname(self.db_path)):
             os.makedirs(os.path.dirname(self.db_path))
 
+        self.connection_manager = ConnectionManager(self.db_path)
         self._initialize_database()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Fecha todas as conexões mantidas pelo conector.
+        """
+        self.connection_manager.close_all()
+
     def _initialize_database(self):
         """
         Inicializa as tabelas necessárias no banco de dados.
         """
         try:
-            self.connection = sqlite3.connect(self.db_path)
-            cursor = self.connection.cursor()
-
-            # Tabelas para custos, receitas e programados
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS custos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    fornecedor TEXT,
-                    data_pagamento TEXT,
-                    valor REAL,
-                    categoria TEXT
-                )
-            ''')
-
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS receitas (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    cliente TEXT,
-                    data_pagamento TEXT,
-                    valor REAL,
-                    categoria TEXT
-                )
-            ''')
-
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS programados (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    descricao TEXT,
-                    tipo TEXT,
-                    data_prevista TEXT,
-                    valor REAL
-                )
-            ''')
-
-            self.connection.commit()
+            with self.connection_manager.connection() as connection:
+                cursor = connection.cursor()
+
+                # Criação e migração em uma única transação: uma falha não deixa o banco pela metade
+                cursor.execute("BEGIN IMMEDIATE")
+
+                # Gatilhos de totais por linha de versões anteriores (substituídos pela atualização por lote)
+                for table in TABLE_COLUMNS:
+                    for event in ("insert", "delete", "update"):
+                        cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table}_totais_{event}")
+
+                # Tabelas para custos, receitas e programados
+                migrated = False
+                for table, schema in TABLE_SCHEMAS.items():
+                    cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} ({schema})")
+                    migrated = self._migrate_table(cursor, table) or migrated
+                if migrated:
+                    # Totais em reais de versões anteriores: recalculados em centavos
+                    cursor.execute("DROP TABLE IF EXISTS totais")
+
+                for table, indexed_columns in TABLE_INDEXES.items():
+                    for column in indexed_columns:
+                        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+
+                # Impressões digitais para ignorar linhas reimportadas
+                for table in TABLE_COLUMNS:
+                    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_fingerprint ON {table} (fingerprint)")
+
+                # Linhas anteriores às impressões (ou de outra versão da fórmula) são recalculadas uma vez
+                if cursor.execute("PRAGMA user_version").fetchone()[0] != FINGERPRINT_VERSION:
+                    for table in TABLE_COLUMNS:
+                        self._backfill_fingerprints(cursor, table)
+                    cursor.execute(f"PRAGMA user_version = {FINGERPRINT_VERSION}")
+
+                self._initialize_running_totals(cursor)
+
             logging.info("Tabelas inicializadas com sucesso.")
         except Exception as e:
             logging.error(f"Erro ao inicializar o banco de dados: {e}")
-        finally:
-            if self.connection:
-                self.connection.close()
+
+    @staticmethod
+    def _migrate_table(cursor, table):
+        """
+        Atualiza tabelas de versões anteriores: acrescenta a coluna de impressões digitais e
+        converte 'valor' de REAL (reais) para INTEGER (centavos), recriando a tabela com os
+        mesmos ids.
+        :return: True se a tabela foi convertida (os totais acumulados devem ser recalculados).
+        """
+        columns = {row[1]: row[2].upper() for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if "fingerprint" not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN fingerprint TEXT")
+        if columns.get("valor") == "INTEGER":
+            return False
+
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_reais")
+        cursor.execute(f"CREATE TABLE {table} ({TABLE_SCHEMAS[table]})")
+        names = ", ".join(("id",) + TABLE_COLUMNS[table] + ("fingerprint",))
+        values = ", ".join("CAST(ROUND(valor * 100) AS INTEGER)" if column == "valor" else column
+                           for column in ("id",) + TABLE_COLUMNS[table] + ("fingerprint",))
+        cursor.execute(f"INSERT INTO {table} ({names}) SELECT {values} FROM {table}_reais")
+        cursor.execute(f"DROP TABLE {table}_reais")
+        logging.info(f"Tabela {table} convertida para valores em centavos.")
+        return True
+
+    @staticmethod
+    def _backfill_fingerprints(cursor, table, batch_size=50000):
+        """
+        Recalcula as impressões digitais de todas as linhas da tabela, em ordem de id e com uma
+        única numeração de repetições, como se tivessem sido inseridas em uma só carga.
+        """
+        if cursor.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None:
+            return
+        fields = ", ".join(VALUE_IN_REAIS if field == "valor" else field for field in FINGERPRINT_FIELDS[table])
+        # Limpa antes de recalcular: valores antigos não colidem com os novos no índice único
+        cursor.execute(f"UPDATE {table} SET fingerprint = NULL")
+        counter = OccurrenceCounter()
+        last_id = 0
+        while True:
+            rows = cursor.execute(f"SELECT id, {fields} FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+                                  (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            fingerprints = fingerprint_keys((row_key(*row[1:]) for row in rows), counter)
+            cursor.executemany(f"UPDATE {table} SET fingerprint = ? WHERE id = ?",
+                               ((fingerprint, row[0]) for row, fingerprint in zip(rows, fingerprints)))
+            last_id = rows[-1][0]
+        logging.info(f"Impressões digitais da tabela {table} recalculadas.")
+
+    def _initialize_running_totals(self, cursor):
+        """
+        Cria a tabela de totais acumulados, mantida pelas próprias inserções em lote (uma
+        atualização agregada por lote, não um gatilho por linha). Bancos existentes têm os
+        totais calculados uma única vez.
+        """
+        seed = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'totais'").fetchone() is None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS totais (
+                tabela TEXT,
+                mes TEXT,
+                categoria TEXT,
+                total INTEGER,
+                quantidade INTEGER,
+                PRIMARY KEY (tabela, mes, categoria)
+            )
+        ''')
+
+        if seed:
+            for table in TABLE_COLUMNS:
+                self._add_running_totals(cursor, table)
+
+    @staticmethod
+    def _last_id(cursor, table):
+        return cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+
+    @staticmethod
+    def _add_running_totals(cursor, table, after_id=0):
+        """
+        Soma aos totais (em centavos) as linhas com id maior que after_id: uma única consulta agrupada por
+        mês e categoria por lote, da qual saem também os totais por mês, por categoria e gerais.
+        Deve ser chamada na mesma transação (BEGIN IMMEDIATE) da inserção: os ids são
+        crescentes (AUTOINCREMENT), então as linhas acima de after_id são exatamente as inseridas.
+        """
+        month = f"COALESCE(substr({DATE_COLUMNS[table]}, 1, 7), '')"
+        category = f"COALESCE({CATEGORY_COLUMNS[table]}, '')"
+        groups = cursor.execute(f"SELECT {month}, {category}, COALESCE(SUM(valor), 0), COUNT(*) "
+                                f"FROM {table} WHERE id > ? GROUP BY 1, 2", (after_id,)).fetchall()
+
+        totals = {}
+        for month_key, category_key, total, count in groups:
+            for key in ((month_key, category_key), (month_key, "*"), ("*", category_key), ("*", "*")):
+                current = totals.get(key, (0, 0))
+                totals[key] = (current[0] + total, current[1] + count)
+        cursor.executemany(
+            "INSERT INTO totais (tabela, mes, categoria, total, quantidade) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(tabela, mes, categoria) DO UPDATE SET "
+            "total = total + excluded.total, quantidade = quantidade + excluded.quantidade",
+            [(table, month_key, category_key, total, count) for (month_key, category_key), (total, count) in totals.items()]
+        )
+
+    def running_total(self, table, month="*", category="*"):
+        """
+        Retorna (soma em reais, contagem) acumulados de uma tabela, sem percorrer as linhas.
+        :param table: Nome da tabela (custos, receitas, programados).
+        :param month: Mês no formato "yyyy-MM" ou "*" para todos.
+        :param category: Categoria (tipo, para programados) ou "*" para todas.
+        """
+        try:
+            connection = self.connection_manager.get_connection()
+            row = connection.execute(
+                "SELECT total, quantidade FROM totais WHERE tabela = ? AND mes = ? AND categoria = ?",
+                (table, month, category)
+            ).fetchone()
+            return (row[0] / 100, row[1]) if row else (0.0, 0)
+        except Exception as e:
+            logging.error(f"Erro ao consultar totais da tabela {table}: {e}")
+            return (0.0, 0)
+
+    def profitability(self, month="*"):
+        """
+        Receita, custo, lucro e margem a partir dos totais acumulados.
+        """
+        total_revenue = self.running_total("receitas", month)[0]
+        total_cost = self.running_total("custos", month)[0]
+        profit = round(total_revenue - total_cost, 2)
+        margin = (profit / total_revenue) * 100 if total_revenue > 0 else 0
+
+        return {
+            'Receita Total': total_revenue,
+            'Custo Total': total_cost,
+            'Lucro': profit,
+            'Margem de Lucro (%)': margin
+        }
 
     def insert_data(self, table, data):
         """
-        Insere dados na tabela especificada.
+        Insere dados na tabela especificada, ignorando linhas já existentes.
         :param table: Nome da tabela (custos, receitas, programados).
         :param data: Lista de dicionários com os dados a serem inseridos.
+        :return: Dicionário com a quantidade de linhas novas e duplicadas.
         """
+        if table not in TABLE_COLUMNS:
+            logging.error(f"Tabela desconhecida: {table}")
+            return None
+
         try:
-            self.connection = sqlite3.connect(self.db_path)
-            cursor = self.connection.cursor()
-
-            if table == "custos":
-                cursor.executemany('''
-                    INSERT INTO custos (fornecedor, data_pagamento, valor, categoria)
-                    VALUES (:fornecedor, :data_pagamento, :valor, :categoria)
-                ''', data)
-
-            elif table == "receitas":
-                cursor.executemany('''
-                    INSERT INTO receitas (cliente, data_pagamento, valor, categoria)
-                    VALUES (:cliente, :data_pagamento, :valor, :categoria)
-                ''', data)
-
-            elif table == "programados":
-                cursor.executemany('''
-                    INSERT INTO programados (descricao, tipo, data_prevista, valor)
-                    VALUES (:descricao, :tipo, :data_prevista, :valor)
-                ''', data)
-
-            else:
-                logging.error(f"Tabela desconhecida: {table}")
-                return
-
-            self.connection.commit()
-            logging.info(f"Dados inseridos com sucesso na tabela {table}.")
+            data = [dict(row, valor=value_to_cents(row.get("valor"))) for row in self._with_fingerprints(table, data)]
+            with self.connection_manager.connection() as connection:
+                cursor = connection.cursor()
+                # Trava de escrita desde o início: os ids acima de last_id são desta inserção
+                cursor.execute("BEGIN IMMEDIATE")
+                last_id = self._last_id(cursor, table)
+
+                if table == "custos":
+                    cursor.executemany('''
+                        INSERT OR IGNORE INTO custos (fornecedor, data_pagamento, valor, categoria, fingerprint)
+                        VALUES (:fornecedor, :data_pagamento, :valor, :categoria, :fingerprint)
+                    ''', data)
+
+                elif table == "receitas":
+                    cursor.executemany('''
+                        INSERT OR IGNORE INTO receitas (cliente, data_pagamento, valor, categoria, fingerprint)
+                        VALUES (:cliente, :data_pagamento, :valor, :categoria, :fingerprint)
+                    ''', data)
+
+                elif table == "programados":
+                    cursor.executemany('''
+                        INSERT OR IGNORE INTO programados (descricao, tipo, data_prevista, valor, fingerprint)
+                        VALUES (:descricao, :tipo, :data_prevista, :valor, :fingerprint)
+                    ''', data)
+
+                inserted = max(cursor.rowcount, 0)
+                self._add_running_totals(cursor, table, last_id)
+
+            report = {"novas": inserted, "duplicadas": len(data) - inserted}
+            logging.info(f"Dados inseridos com sucesso na tabela {table}: {report['novas']} novas, "
+                         f"{report['duplicadas']} duplicadas ignoradas.")
+            return report
         except Exception as e:
             logging.error(f"Erro ao inserir dados na tabela {table}: {e}")
-        finally:
-            if self.connection:
-                self.connection.close()
+            return None
+
+    def _with_fingerprints(self, table, data):
+        """
+        Retorna cópias dos dicionários acrescidas da impressão digital de cada linha.
+        """
+        data = list(data)
+        fields = FINGERPRINT_FIELDS[table]
+        keys = (row_key(*(row.get(field) for field in fields)) for row in data)
+        return [dict(row, fingerprint=fingerprint) for row, fingerprint in zip(data, fingerprint_keys(keys))]
+
+    def bulk_load(self, table, rows, batch_size=50000, deduplicate=True):
+        """
+        Carrega grandes volumes de dados em lotes, com memória limitada.
+        :param table: Nome da tabela (custos, receitas, programados).
+        :param rows: DataFrame (colunas do banco ou do ExcelImporter) ou iterável de tuplas
+                     posicionais / dicionários na ordem de TABLE_COLUMNS.
+        :param batch_size: Quantidade de linhas inseridas e confirmadas por transação.
+        :param deduplicate: Calcula impressões digitais e ignora linhas já existentes.
+        :return: Dicionário com linhas lidas, inseridas e duplicadas, tempo gasto e linhas por segundo.
+        """
+        if table not in TABLE_COLUMNS:
+            logging.error(f"Tabela desconhecida: {table}")
+            return None
+
+        columns = TABLE_COLUMNS[table] + (("fingerprint",) if deduplicate else ())
+        query = f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        total_rows = 0
+        inserted_rows = 0
+        start = time.perf_counter()
+
+        try:
+            iterator = iter(self._iter_positional_rows(table, rows, batch_size))
+            if deduplicate:
+                iterator = self._append_fingerprints(table, iterator)
+            # As impressões usam o valor em reais; a gravação, em centavos
+            value_index = TABLE_COLUMNS[table].index("valor")
+            iterator = (row[:value_index] + (value_to_cents(row[value_index]),) + row[value_index + 1:]
+                        for row in iterator)
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    break
+                with self.connection_manager.connection() as connection:
+                    cursor = connection.cursor()
+                    cursor.execute("BEGIN IMMEDIATE")
+                    last_id = self._last_id(cursor, table)
+                    inserted_rows += max(cursor.executemany(query, batch).rowcount, 0)
+                    self._add_running_totals(cursor, table, last_id)
+                total_rows += len(batch)
+
+            elapsed = time.perf_counter() - start
+            rows_per_second = total_rows / elapsed if elapsed > 0 else 0.0
+            logging.info(f"{inserted_rows} de {total_rows} linhas carregadas na tabela {table} em {elapsed:.2f}s "
+                         f"({rows_per_second:.0f} linhas/s).")
+            return {"linhas": total_rows, "novas": inserted_rows, "duplicadas": total_rows - inserted_rows,
+                    "segundos": elapsed, "linhas_por_segundo": rows_per_second}
+        except Exception as e:
+            logging.error(f"Erro na carga em lote da tabela {table} após {total_rows} linhas: {e}")
+            return None
+
+    def _append_fingerprints(self, table, rows):
+        """
+        Acrescenta a impressão digital ao final de cada tupla posicional.
+        """
+        columns = TABLE_COLUMNS[table]
+        indexes = [columns.index(field) for field in FINGERPRINT_FIELDS[table]]
+        rows, key_rows = tee(rows)
+        keys = (row_key(*(row[index] for index in indexes)) for row in key_rows)
+        return (row + (fingerprint,) for row, fingerprint in zip(rows, fingerprint_keys(keys)))
+
+    def _iter_positional_rows(self, table, rows, chunk_size=50000):
+        """
+        Converte DataFrames e dicionários em tuplas na ordem das colunas da tabela.
+        """
+        columns = TABLE_COLUMNS[table]
+        if hasattr(rows, "itertuples"):
+            return self._iter_frame_rows(table, rows, chunk_size)
+        return (tuple(row[column] for column in columns) if isinstance(row, dict) else tuple(row) for row in rows)
+
+    @staticmethod
+    def _iter_frame_rows(table, df, chunk_size):
+        """
+        Itera um DataFrame em fatias, sem criar dicionários: apenas a fatia atual é copiada
+        e tem as datas convertidas em texto.
+        """
+        aliases = {column: source for source, column in IMPORTER_COLUMN_ALIASES[table].items() if source in df.columns}
+        source_columns = [aliases.get(column, column) for column in TABLE_COLUMNS[table]]
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size][source_columns]
+            for column in source_columns:
+                if str(chunk[column].dtype).startswith("datetime64"):
+                    chunk[column] = chunk[column].dt.strftime("%Y-%m-%d")
+            yield from chunk.itertuples(index=False, name=None)
 
     def fetch_data(self, table, filters=None):
         """
@@ -114,27 +507,185 @@ class DatabaseConnector:
         :param filters: Dicionário com colunas e valores para filtrar (opcional).
         """
         try:
-            self.connection = sqlite3.connect(self.db_path)
-            cursor = self.connection.cursor()
+            with self.connection_manager.connection() as connection:
+                cursor = connection.cursor()
 
-            query = f"SELECT * FROM {table}"
-            if filters:
-                conditions = [f"{col} = ?" for col in filters.keys()]
-                query += " WHERE " + " AND ".join(conditions)
-                cursor.execute(query, list(filters.values()))
-            else:
-                cursor.execute(query)
+                query = f"SELECT {self._select_list(('id',) + TABLE_COLUMNS[table] + ('fingerprint',))} FROM {table}"
+                if filters:
+                    conditions = [f"{col} = ?" for col in filters.keys()]
+                    query += " WHERE " + " AND ".join(conditions)
+                    cursor.execute(query, [value_to_cents(value) if column == "valor" else value
+                                           for column, value in filters.items()])
+                else:
+                    cursor.execute(query)
 
-            rows = cursor.fetchall()
-            columns = [desc[0] for desc in cursor.description]
-            return [dict(zip(columns, row)) for row in rows]
+                rows = cursor.fetchall()
+                columns = [desc[0] for desc in cursor.description]
+                return [dict(zip(columns, row)) for row in rows]
 
         except Exception as e:
             logging.error(f"Erro ao buscar dados da tabela {table}: {e}")
             return []
+
+    def _build_conditions(self, table, start_date=None, end_date=None, categories=None,
+                          min_value=None, max_value=None):
+        """
+        Monta a cláusula WHERE parametrizada para os filtros por intervalo.
+        :return: Tupla (cláusula WHERE, possivelmente vazia, e lista de parâmetros).
+        """
+        if table not in TABLE_COLUMNS:
+            raise ValueError(f"Tabela desconhecida: {table}")
+
+        date_column = DATE_COLUMNS[table]
+        conditions = []
+        params = []
+
+        # Datas no formato "yyyy-MM-dd" ou "yyyy-MM"; a data final é inclusiva
+        if start_date:
+            conditions.append(f"{date_column} >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append(f"{date_column} <= ?")
+            params.append(end_date if len(end_date) > 7 else f"{end_date}-31")
+        if categories:
+            categories = list(categories)
+            conditions.append(f"{CATEGORY_COLUMNS[table]} IN ({', '.join('?' for _ in categories)})")
+            params.extend(categories)
+        if min_value is not None:
+            conditions.append("valor >= ?")
+            params.append(value_to_cents(min_value))
+        if max_value is not None:
+            conditions.append("valor <= ?")
+            params.append(value_to_cents(max_value))
+
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, params
+
+    def _build_range_query(self, table, start_date=None, end_date=None, categories=None,
+                           min_value=None, max_value=None, columns=None):
+        """
+        Monta a consulta SQL parametrizada para os filtros por intervalo.
+        """
+        where, params = self._build_conditions(table, start_date, end_date, categories, min_value, max_value)
+
+        valid_columns = ("id",) + TABLE_COLUMNS[table]
+        columns = tuple(columns) if columns else valid_columns
+        invalid = [column for column in columns if column not in valid_columns]
+        if invalid:
+            raise ValueError(f"Colunas inválidas para a tabela {table}: {invalid}")
+
+        query = f"SELECT {self._select_list(columns)} FROM {table}{where} ORDER BY {DATE_COLUMNS[table]}"
+        return query, params, columns
+
+    @staticmethod
+    def _select_list(columns):
+        return ", ".join(f"{VALUE_IN_REAIS} AS valor" if column == "valor" else column for column in columns)
+
+    def iter_range(self, table, start_date=None, end_date=None, categories=None,
+                   min_value=None, max_value=None, columns=None, chunk_size=10000):
+        """
+        Gera as linhas que atendem aos filtros sob demanda, como tuplas.
+        :param table: Nome da tabela (custos, receitas, programados).
+        :param start_date: Data inicial ("yyyy-MM" ou "yyyy-MM-dd").
+        :param end_date: Data final inclusiva ("yyyy-MM" ou "yyyy-MM-dd").
+        :param categories: Lista de categorias aceitas (tipo, para programados).
+        :param min_value: Valor mínimo (opcional).
+        :param max_value: Valor máximo (opcional).
+        :param columns: Colunas retornadas, na ordem desejada (padrão: todas).
+        :param chunk_size: Quantidade de linhas lidas do cursor por vez.
+        """
+        query, params, _ = self._build_range_query(table, start_date, end_date, categories,
+                                                   min_value, max_value, columns)
+        cursor = self.connection_manager.get_connection().cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
         finally:
-            if self.connection:
-                self.connection.close()
+            cursor.close()
+
+    def fetch_range(self, table, start_date=None, end_date=None, categories=None,
+                    min_value=None, max_value=None, columns=None):
+        """
+        Retorna as linhas que atendem aos filtros diretamente em um DataFrame.
+        Os parâmetros são os mesmos de iter_range.
+        """
+        import pandas as pd
+
+        try:
+            query, params, _ = self._build_range_query(table, start_date, end_date, categories,
+                                                       min_value, max_value, columns)
+            connection = self.connection_manager.get_connection()
+            return pd.read_sql_query(query, connection, params=params)
+        except Exception as e:
+            logging.error(f"Erro ao buscar intervalo da tabela {table}: {e}")
+            return pd.DataFrame()
+
+    def aggregate(self, table, group_by=("mes",), start_date=None, end_date=None, categories=None,
+                  min_value=None, max_value=None, top_n=None):
+        """
+        Agrega valores no próprio SQLite (GROUP BY), retornando apenas o resumo.
+        :param table: Nome da tabela (custos, receitas, programados).
+        :param group_by: Colunas de agrupamento; "mes" agrupa pelo mês ("yyyy-MM") da data.
+        :param top_n: Se informado, retorna apenas os N grupos de maior total.
+        Os demais parâmetros filtram as linhas como em iter_range.
+        :return: DataFrame com as colunas de agrupamento, "total" e "quantidade".
+        """
+        import pandas as pd
+
+        try:
+            where, params = self._build_conditions(table, start_date, end_date, categories, min_value, max_value)
+
+            group_by = (group_by,) if isinstance(group_by, str) else tuple(group_by)
+            expressions = []
+            for column in group_by:
+                if column == "mes":
+                    expressions.append(f"substr({DATE_COLUMNS[table]}, 1, 7) AS mes")
+                elif column in TABLE_COLUMNS[table]:
+                    expressions.append(column)
+                else:
+                    raise ValueError(f"Coluna de agrupamento inválida para a tabela {table}: {column}")
+
+            query = f"SELECT {', '.join(expressions + ['SUM(valor) / 100.0 AS total', 'COUNT(*) AS quantidade'])} FROM {table}{where}"
+            if group_by:
+                query += f" GROUP BY {', '.join(group_by)}"
+            if top_n is not None:
+                query += " ORDER BY total DESC LIMIT ?"
+                params.append(int(top_n))
+            elif group_by:
+                query += f" ORDER BY {', '.join(group_by)}"
+
+            connection = self.connection_manager.get_connection()
+            return pd.read_sql_query(query, connection, params=params)
+        except Exception as e:
+            logging.error(f"Erro ao agregar dados da tabela {table}: {e}")
+            return pd.DataFrame()
+
+    def monthly_totals(self, table, by_category=False, start_date=None, end_date=None):
+        """
+        Totais mensais, opcionalmente separados por categoria.
+        """
+        group_by = ("mes", CATEGORY_COLUMNS[table]) if by_category else ("mes",)
+        return self.aggregate(table, group_by, start_date=start_date, end_date=end_date)
+
+    def category_totals(self, table, start_date=None, end_date=None):
+        """
+        Totais por categoria (tipo, para programados).
+        """
+        return self.aggregate(table, (CATEGORY_COLUMNS[table],), start_date=start_date, end_date=end_date)
+
+    def top_counterparties(self, table, n=5, start_date=None, end_date=None):
+        """
+        Maiores fornecedores (custos) ou clientes (receitas) pelo valor total.
+        """
+        counterparty = {"custos": "fornecedor", "receitas": "cliente"}.get(table)
+        if counterparty is None:
+            logging.error(f"Tabela sem contraparte para ranking: {table}")
+            return None
+        return self.aggregate(table, (counterparty,), start_date=start_date, end_date=end_date, top_n=n)
 
     def clear_table(self, table):
         """
@@ -142,16 +693,13 @@ class DatabaseConnector:
         :param table: Nome da tabela (custos, receitas, programados).
         """
         try:
-            self.connection = sqlite3.connect(self.db_path)
-            cursor = self.connection.cursor()
-            cursor.execute(f"DELETE FROM {table}")
-            self.connection.commit()
+            with self.connection_manager.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f"DELETE FROM {table}")
+                cursor.execute("DELETE FROM totais WHERE tabela = ?", (table,))
             logging.info(f"Dados da tabela {table} limpos com sucesso.")
         except Exception as e:
             logging.error(f"Erro ao limpar dados da tabela {table}: {e}")
-        finally:
-            if self.connection:
-                self.connection.close()
 
 # Exemplo de uso
 if __name__ == "__main__":
@@ -170,3 +718,5 @@ if __name__ == "__main__":
 
     # Limpar tabela
     db_connector.clear_table("custos")
+
+    db_connector.close()
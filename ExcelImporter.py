@@ -3,11 +3,77 @@ import os
 import logging
 from cryptography.fernet import Fernet
 import json
+import re
+import glob
+import time
+import hashlib
+import threading
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from DataReader import DataReader, partition_cache, _decrypt_partition
+from PartitionManifest import PartitionManifest
+from RowFingerprint import fingerprint_frame, OccurrenceCounter, FINGERPRINT_VERSION
+from RunningTotals import RunningTotals, DATA_TYPE_TIPOS
+from DataSchema import SCHEMA_VERSION, encode_frame, normalize_frame, categorize, parse_dates
 
 # Configuração de log
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Colunas da planilha necessárias para cada tipo de dado
+REQUIRED_COLUMNS = {
+    "custos": ['Fornecedor - Nome', 'Pagamento', 'Valor'],
+    "receitas": ['Cliente - Nome', 'Pagamento', 'Valor'],
+    "programados": ['Descrição', 'Tipo', 'Pagamento', 'Valor'],
+}
+
+# Coluna de contraparte usada, com data e valor, na impressão digital de cada linha processada
+FINGERPRINT_COLUMNS = {
+    "custos": 'Fornecedor',
+    "receitas": 'Cliente',
+    "programados": 'Descrição',
+}
+
+# Inferência de tipo e mês pelo nome do arquivo, ex.: "custos_2024-05.xlsx" ou "Receitas_2024_05.xlsx"
+WORKBOOK_NAME_PATTERN = re.compile(r"(custos|receitas|programados)[_-](\d{4})[_-](\d{2})", re.IGNORECASE)
+
+def _import_workbook(encryption_key, storage_path, file_path, data_type, selected_date):
+    """
+    Lê, processa e criptografa uma planilha em um processo separado.
+    O arquivo é gravado com extensão temporária; o processo principal o publica e
+    atualiza manifesto e fila de categorias, que não são gravados aqui.
+    """
+    start = time.perf_counter()
+    importer = ExcelImporter(encryption_key, storage_path)
+    importer.autosave_pending = False
+
+    required_columns = REQUIRED_COLUMNS[data_type]
+    df = pd.read_excel(file_path, usecols=lambda column: column in required_columns)
+    df = importer._process(df, data_type)
+    if df is None:
+        raise ValueError(f"Colunas necessárias para {data_type} não encontradas.")
+    parse_time = time.perf_counter() - start
+
+    file_name = f"{data_type}_{selected_date}.json"
+    content = importer._write_encrypted(df, os.path.join(storage_path, f"{file_name}.tmp"))
+    min_date, max_date = importer._payment_date_range(df)
+    pending = {name: importer.pending_review[name] for name in importer.last_import_pending}
+    fingerprints = importer._fingerprints(df, data_type)
+    contributions = importer._contributions(df, data_type)
+
+    return {
+        "arquivo_dados": file_name,
+        "linhas": len(df),
+        "data_min": min_date,
+        "data_max": max_date,
+        "bytes": len(content),
+        "checksum": hashlib.sha256(content).hexdigest(),
+        "pendentes": pending,
+        "impressoes": fingerprints,
+        "totais": contributions,
+        "leitura (s)": parse_time,
+        "criptografia (s)": time.perf_counter() - start - parse_time,
+    }
+
 class ExcelImporter:
     def __init__(self, encryption_key, storage_path="utils/data/"):
         """
@@ -18,10 +84,31 @@ class ExcelImporter:
         self.encryption_key = encryption_key
         self.storage_path = storage_path
         os.makedirs(storage_path, exist_ok=True)
+        self.manifest = PartitionManifest(storage_path)
+        # Partições gravadas antes do manifesto são registradas antes da primeira gravação
+        try:
+            self.ensure_manifest()
+        except ValueError as e:
+            logging.error(str(e))
+        self._write_lock = threading.RLock()
+
+        # Totais por mês, Tipo e Categoria, mantidos a cada gravação de partição
+        self.running_totals = RunningTotals(storage_path, encryption_key)
+        self.ensure_running_totals()
+        self.ensure_fingerprints()
 
         self.categories = defaultdict(lambda: "Não categorizado")
         self.load_categories()
 
+        # Nomes sem categoria aguardando revisão, em vez de interromper a importação
+        self.pending_review = {}
+        self.last_import_pending = set()
+        self.autosave_pending = True
+
+        # Linhas novas e duplicadas (já presentes na partição) na última gravação
+        self.last_import_report = {"novas": 0, "duplicadas": 0}
+        self.load_pending_review()
+
     def load_categories(self):
         """
         Carrega categorias salvas para fornecedores e clientes.
@@ -47,68 +134,403 @@ class ExcelImporter:
         except Exception as e:
             logging.error(f"Erro ao salvar categorias: {e}")
 
-    def import_financial_data(self, file_path, data_type, selected_date):
+    def load_pending_review(self):
+        """
+        Carrega a fila de nomes pendentes de categorização.
+        """
+        try:
+            pending_file = os.path.join(self.storage_path, "pending_categories.json")
+            if os.path.exists(pending_file):
+                with open(pending_file, 'r') as f:
+                    self.pending_review.update(json.load(f))
+        except Exception as e:
+            logging.error(f"Erro ao carregar categorias pendentes: {e}")
+
+    def save_pending_review(self):
+        """
+        Salva a fila de nomes pendentes de categorização.
+        """
+        try:
+            pending_file = os.path.join(self.storage_path, "pending_categories.json")
+            with open(pending_file, 'w') as f:
+                json.dump(self.pending_review, f)
+        except Exception as e:
+            logging.error(f"Erro ao salvar categorias pendentes: {e}")
+
+    def get_pending_review(self, kind=None):
+        """
+        Retorna os nomes pendentes de categorização.
+        :param kind: Filtra por "fornecedor" ou "cliente" (opcional).
+        """
+        return sorted(name for name, name_kind in self.pending_review.items() if kind is None or name_kind == kind)
+
+    def resolve_pending(self, resolutions):
+        """
+        Define em lote a categoria de nomes pendentes.
+        :param resolutions: Dicionário {nome: categoria}.
+        :return: Quantidade de nomes resolvidos.
+        """
+        resolved = 0
+        for name, category in resolutions.items():
+            if not category:
+                continue
+            self.categories[name] = category
+            self.pending_review.pop(name, None)
+            resolved += 1
+
+        if resolved:
+            self.save_categories()
+            self.save_pending_review()
+            logging.info(f"{resolved} categorias pendentes resolvidas.")
+        return resolved
+
+    def _categorize_column(self, names, kind):
+        """
+        Categoriza uma coluna consultando cada nome distinto uma única vez.
+        Nomes desconhecidos recebem "Não categorizado" e entram na fila de revisão.
+        :param names: Série com nomes de fornecedores ou clientes.
+        :param kind: "fornecedor" ou "cliente".
+        """
+        known = {}
+        unknown = []
+        for name in names.dropna().unique():
+            if name in self.categories:
+                known[name] = self.categories[name]
+            else:
+                unknown.append(name)
+
+        if unknown:
+            new_pending = [name for name in unknown if name not in self.pending_review]
+            for name in new_pending:
+                self.pending_review[name] = kind
+            self.last_import_pending.update(unknown)
+            if new_pending and self.autosave_pending:
+                self.save_pending_review()
+                logging.warning(f"{len(new_pending)} {kind}(es) sem categoria adicionados à fila de revisão.")
+
+        return names.map(known).fillna(self.categories.default_factory())
+
+    def import_financial_data(self, file_path, data_type, selected_date, append=False):
         """
         Importa dados financeiros de um arquivo Excel.
         :param file_path: Caminho do arquivo Excel.
         :param data_type: Tipo de dado a importar (custos, receitas, programados).
         :param selected_date: Data selecionada no formato "yyyy-MM".
+        :param append: Adiciona à partição existente, ignorando linhas já importadas,
+                       em vez de substituí-la.
+        :return: DataFrame importado; os nomes sem categoria ficam em last_import_pending e a
+                 contagem de linhas novas/duplicadas em last_import_report.
         """
         if not os.path.exists(file_path):
             logging.error(f"Arquivo não encontrado: {file_path}")
             return None
 
+        if data_type not in REQUIRED_COLUMNS:
+            logging.error("Tipo de dado desconhecido.")
+            return None
+
+        self.last_import_pending = set()
         try:
-            df = pd.read_excel(file_path)
-            if data_type == "custos":
-                df = self.process_costs(df)
-            elif data_type == "receitas":
-                df = self.process_revenues(df)
-            elif data_type == "programados":
-                df = self.process_scheduled(df)
-            else:
-                logging.error("Tipo de dado desconhecido.")
-                return None
+            # Lê apenas as colunas necessárias; as ausentes são reportadas pelo processamento
+            required_columns = REQUIRED_COLUMNS[data_type]
+            df = pd.read_excel(file_path, usecols=lambda column: column in required_columns)
+            df = self._process(df, data_type)
 
-            self.save_encrypted_data(df, data_type, selected_date)
+            self._store(df, data_type, selected_date, append)
             return df
         except Exception as e:
             logging.error(f"Erro ao importar dados: {e}")
             return None
 
+    def import_folder(self, source, mapping=None, max_workers=None):
+        """
+        Importa em paralelo várias planilhas de uma pasta ou padrão glob.
+        Leitura, categorização e criptografia rodam em um pool de processos; apenas a
+        publicação dos arquivos, o manifesto e a fila de categorias são feitos aqui, em série.
+        :param source: Diretório (todas as planilhas .xlsx) ou padrão glob.
+        :param mapping: Dicionário {nome do arquivo: (tipo, "yyyy-MM")} ou função que recebe o
+                        caminho e retorna essa tupla; por padrão, inferido do nome do arquivo.
+        :param max_workers: Número máximo de processos (padrão: núcleos disponíveis).
+        :return: Lista com um relatório por arquivo (status, linhas, tempos e erro).
+        """
+        pattern = os.path.join(source, "*.xlsx") if os.path.isdir(source) else source
+        file_paths = sorted(glob.glob(pattern))
+
+        report = []
+        jobs = []
+        targets = set()
+        for file_path in file_paths:
+            item = {"arquivo": file_path, "tipo": None, "mes": None, "status": "erro", "linhas": 0, "erro": None}
+            report.append(item)
+            try:
+                data_type, selected_date = self._resolve_workbook_target(file_path, mapping)
+            except Exception as e:
+                item["erro"] = str(e)
+                continue
+            item["tipo"], item["mes"] = data_type, selected_date
+            if (data_type, selected_date) in targets:
+                item["erro"] = "Partição duplicada no lote."
+                continue
+            targets.add((data_type, selected_date))
+            jobs.append(item)
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [(item, executor.submit(_import_workbook, self.encryption_key, self.storage_path,
+                                              item["arquivo"], item["tipo"], item["mes"])) for item in jobs]
+            for item, future in futures:
+                try:
+                    result = future.result()
+                    self._publish_workbook(item, result)
+                except Exception as e:
+                    item["erro"] = str(e)
+                    logging.error(f"Erro ao importar {item['arquivo']}: {e}")
+
+        if any(item["status"] == "ok" for item in report):
+            self.save_pending_review()
+        imported = sum(1 for item in report if item["status"] == "ok")
+        logging.info(f"{imported} de {len(report)} planilhas importadas em {time.perf_counter() - start:.2f}s.")
+        return report
+
+    def _resolve_workbook_target(self, file_path, mapping):
+        """
+        Determina o tipo de dado e o mês de uma planilha do lote.
+        """
+        if callable(mapping):
+            data_type, selected_date = mapping(file_path)
+        elif mapping is not None:
+            data_type, selected_date = mapping[os.path.basename(file_path)]
+        else:
+            match = WORKBOOK_NAME_PATTERN.search(os.path.basename(file_path))
+            if not match:
+                raise ValueError("Não foi possível inferir tipo e mês pelo nome do arquivo.")
+            data_type, selected_date = match.group(1).lower(), f"{match.group(2)}-{match.group(3)}"
+
+        if data_type not in REQUIRED_COLUMNS:
+            raise ValueError(f"Tipo de dado desconhecido: {data_type}")
+        return data_type, selected_date
+
+    def _publish_workbook(self, item, result):
+        """
+        Publica o arquivo gerado por um processo do lote e registra manifesto e pendências.
+        """
+        publish_start = time.perf_counter()
+        file_name = result["arquivo_dados"]
+        file_path = os.path.join(self.storage_path, file_name)
+        with self._write_lock:
+            self.ensure_manifest()
+            os.replace(f"{file_path}.tmp", file_path)
+            self._record_partition(item["tipo"], item["mes"], file_name, result["linhas"],
+                                   result["data_min"], result["data_max"], result["bytes"], result["checksum"])
+            self._replace_fingerprints(item["tipo"], item["mes"], result["impressoes"])
+            self._replace_totals(item["tipo"], item["mes"], result["totais"])
+
+        for name, kind in result["pendentes"].items():
+            self.pending_review.setdefault(name, kind)
+
+        item.update({
+            "status": "ok",
+            "linhas": result["linhas"],
+            "pendentes": len(result["pendentes"]),
+            "novas": self.last_import_report["novas"],
+            "duplicadas": self.last_import_report["duplicadas"],
+            "leitura (s)": round(result["leitura (s)"], 3),
+            "criptografia (s)": round(result["criptografia (s)"], 3),
+            "publicação (s)": round(time.perf_counter() - publish_start, 3),
+        })
+
+    def import_financial_data_streaming(self, file_path, data_type, selected_date, chunk_size=10000,
+                                        progress_callback=None, append=False):
+        """
+        Importa dados financeiros lendo a planilha em blocos de linhas, com memória limitada.
+        Apenas as colunas necessárias são extraídas de cada linha (pasta de trabalho somente leitura),
+        e cada bloco é gravado assim que processado, sem manter a planilha inteira em memória.
+        :param file_path: Caminho do arquivo Excel.
+        :param data_type: Tipo de dado a importar (custos, receitas, programados).
+        :param selected_date: Data selecionada no formato "yyyy-MM".
+        :param chunk_size: Quantidade de linhas processadas por bloco.
+        :param progress_callback: Função chamada com (linhas processadas, total estimado de linhas)
+                                  após cada bloco.
+        :param append: Adiciona à partição existente, ignorando linhas já importadas.
+        :return: Quantidade de linhas processadas, ou None em caso de erro; a contagem de linhas
+                 novas/duplicadas fica em last_import_report.
+        """
+        if not os.path.exists(file_path):
+            logging.error(f"Arquivo não encontrado: {file_path}")
+            return None
+
+        if data_type not in REQUIRED_COLUMNS:
+            logging.error("Tipo de dado desconhecido.")
+            return None
+
+        from openpyxl import load_workbook
+
+        self.last_import_pending = set()
+        workbook = None
+        try:
+            workbook = load_workbook(file_path, read_only=True, data_only=True)
+            sheet = workbook.worksheets[0]
+            rows = sheet.iter_rows(values_only=True)
+
+            header = list(next(rows, ()))
+            required_columns = REQUIRED_COLUMNS[data_type]
+            missing = [column for column in required_columns if column not in header]
+            if missing:
+                logging.error(f"Colunas necessárias para {data_type} não encontradas: {missing}")
+                return None
+            indexes = [header.index(column) for column in required_columns]
+            total_rows = max((sheet.max_row or 1) - 1, 0)
+
+            with self._write_lock:
+                processed_rows = self._store_chunks(self._iter_chunks(rows, indexes, chunk_size), data_type,
+                                                    selected_date, append, total_rows, progress_callback)
+            if progress_callback:
+                progress_callback(processed_rows, processed_rows)
+            return processed_rows
+        except Exception as e:
+            logging.error(f"Erro ao importar dados: {e}")
+            return None
+        finally:
+            if workbook is not None:
+                workbook.close()
+
+    @staticmethod
+    def _iter_chunks(rows, indexes, chunk_size):
+        """
+        Agrupa as linhas não vazias da planilha em blocos, extraindo apenas as colunas necessárias.
+        """
+        chunk = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            chunk.append([row[index] if index < len(row) else None for index in indexes])
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _store_chunks(self, chunks, data_type, selected_date, append, total_rows, progress_callback):
+        """
+        Processa e grava cada bloco assim que é lido: o primeiro substitui a partição (ou, com
+        append, vira um segmento) e os seguintes são segmentos, de modo que a memória não cresce
+        com o tamanho da planilha. Uma única numeração de repetições vale para todos os blocos.
+        O índice de impressões é gravado ao final; até lá fica ausente, e uma importação
+        interrompida o tem recalculado a partir do que foi gravado.
+        :return: Quantidade de linhas processadas.
+        """
+        self.ensure_manifest()
+        required_columns = REQUIRED_COLUMNS[data_type]
+        source = f"{data_type}_{selected_date}"
+        entry = self.manifest.get(data_type, selected_date)
+        known = self.load_fingerprints(data_type, selected_date) if append and entry else set()
+        # Na substituição, linhas que já existiam são contadas contra o índice anterior
+        previous = None if append else (self._read_fingerprints(data_type, selected_date) or set())
+        fingerprint_path = self._fingerprint_path(data_type, selected_date)
+        if os.path.exists(fingerprint_path):
+            os.remove(fingerprint_path)
+
+        counter = OccurrenceCounter()
+        report = {"novas": 0, "duplicadas": 0}
+        processed_rows = 0
+        write_base = not (append and entry)
+        for chunk in chunks:
+            df = self._process(pd.DataFrame(chunk, columns=required_columns), data_type)
+            if df is None:
+                raise ValueError(f"Falha ao processar bloco de {data_type}.")
+            processed_rows += len(df)
+            fingerprints = self._fingerprints(df, data_type, counter)
+            if append:
+                is_new = [fingerprint not in known for fingerprint in fingerprints]
+                df = df[is_new]
+                fingerprints = [fingerprint for fingerprint, new in zip(fingerprints, is_new) if new]
+                duplicates = len(is_new) - len(df)
+            else:
+                duplicates = sum(1 for fingerprint in fingerprints if fingerprint in previous)
+            report["novas"] += len(fingerprints) - (0 if append else duplicates)
+            report["duplicadas"] += duplicates
+            known.update(fingerprints)
+
+            if not df.empty:
+                if write_base:
+                    self._write_base(df, data_type, selected_date)
+                    self._replace_totals(data_type, selected_date, self._contributions(df, data_type))
+                    write_base = False
+                else:
+                    self._write_segment(df, data_type, selected_date, self.manifest.get(data_type, selected_date))
+                    self.running_totals.add(source, selected_date, DATA_TYPE_TIPOS[data_type],
+                                            self._contributions(df, data_type))
+            if progress_callback:
+                progress_callback(processed_rows, total_rows)
+
+        # Planilha sem linhas: a substituição grava uma partição vazia, como na importação completa
+        if write_base and not append:
+            df = self._process(pd.DataFrame(columns=required_columns), data_type)
+            self._write_base(df, data_type, selected_date)
+            self._replace_totals(data_type, selected_date, {})
+
+        if self.manifest.get(data_type, selected_date) is not None:
+            self._save_fingerprints(data_type, selected_date, known)
+        self.last_import_report = report
+        logging.info(f"Dados de {data_type} para {selected_date} importados em blocos: {report['novas']} linhas novas, "
+                     f"{report['duplicadas']} duplicadas.")
+        return processed_rows
+
+    def _store(self, df, data_type, selected_date, append):
+        """
+        Grava o resultado de uma importação, substituindo ou adicionando à partição.
+        """
+        if append:
+            self.append_data(data_type, selected_date, df)
+        else:
+            self.save_encrypted_data(df, data_type, selected_date)
+
+    def _process(self, df, data_type):
+        """
+        Encaminha o DataFrame para o processamento do tipo de dado correspondente
+        e aplica o esquema tipado (datas, centavos e categorias) uma única vez.
+        """
+        if data_type == "custos":
+            df = self.process_costs(df)
+        elif data_type == "receitas":
+            df = self.process_revenues(df)
+        else:
+            df = self.process_scheduled(df)
+        return None if df is None else normalize_frame(df)
+
     def process_costs(self, df):
         """
         Processa dados de custos.
         """
-        required_columns = ['Fornecedor - Nome', 'Pagamento', 'Valor']
+        required_columns = REQUIRED_COLUMNS["custos"]
         if not all(col in df.columns for col in required_columns):
             logging.error("Colunas necessárias para custos não encontradas.")
             return None
 
         df = df[required_columns]
         df.columns = ['Fornecedor', 'Data Pagamento', 'Valor']
-        df['Categoria'] = df['Fornecedor'].apply(self.categorize_supplier)
+        df['Categoria'] = self._categorize_column(df['Fornecedor'], "fornecedor")
         return df
 
     def process_revenues(self, df):
         """
         Processa dados de receitas.
         """
-        required_columns = ['Cliente - Nome', 'Pagamento', 'Valor']
+        required_columns = REQUIRED_COLUMNS["receitas"]
         if not all(col in df.columns for col in required_columns):
             logging.error("Colunas necessárias para receitas não encontradas.")
             return None
 
         df = df[required_columns]
         df.columns = ['Cliente', 'Data Pagamento', 'Valor']
-        df['Categoria'] = df['Cliente'].apply(self.categorize_client)
+        df['Categoria'] = self._categorize_column(df['Cliente'], "cliente")
         return df
 
     def process_scheduled(self, df):
         """
         Processa dados programados.
         """
-        required_columns = ['Descrição', 'Tipo', 'Pagamento', 'Valor']
+        required_columns = REQUIRED_COLUMNS["programados"]
         if not all(col in df.columns for col in required_columns):
             logging.error("Colunas necessárias para programados não encontradas.")
             return None
@@ -119,58 +541,353 @@ class ExcelImporter:
 
     def categorize_supplier(self, supplier):
         """
-        Categoriza um fornecedor.
+        Categoriza um fornecedor; desconhecidos vão para a fila de revisão.
         """
-        if supplier not in self.categories:
-            self.categories[supplier] = input(f"Por favor, categorize o fornecedor '{supplier}': ")
-        return self.categories[supplier]
+        return self._categorize_column(pd.Series([supplier]), "fornecedor").iloc[0]
 
     def categorize_client(self, client):
         """
-        Categoriza um cliente.
+        Categoriza um cliente; desconhecidos vão para a fila de revisão.
+        """
+        return self._categorize_column(pd.Series([client]), "cliente").iloc[0]
+
+    def _write_encrypted(self, df, file_path):
+        """
+        Criptografa um DataFrame e grava no caminho informado, com datas em dias e valores em centavos.
+        A gravação é atômica (arquivo temporário + os.replace): leitores nunca veem um arquivo parcial.
+        :return: Conteúdo gravado, em bytes.
         """
-        if client not in self.categories:
-            self.categories[client] = input(f"Por favor, categorize o cliente '{client}': ")
-        return self.categories[client]
+        fernet = Fernet(self.encryption_key)
+        json_data = encode_frame(df).to_json(orient='records')
+        encrypted_data = fernet.encrypt(json_data.encode()).decode()
+
+        content = json.dumps({"data": encrypted_data, "esquema": SCHEMA_VERSION}).encode()
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, file_path)
+        partition_cache.invalidate(file_path)
+        return content
 
     def save_encrypted_data(self, df, data_type, selected_date):
         """
         Criptografa e salva os dados processados.
+        Substitui a partição inteira, incluindo segmentos adicionados por append_data.
         :param df: DataFrame a ser salvo.
         :param data_type: Tipo de dado (custos, receitas, programados).
         :param selected_date: Data no formato "yyyy-MM".
         """
         try:
-            fernet = Fernet(self.encryption_key)
-            json_data = df.to_json(orient='records')
-            encrypted_data = fernet.encrypt(json_data.encode()).decode()
-
-            file_name = f"{data_type}_{selected_date}.json"
-            file_path = os.path.join(self.storage_path, file_name)
-
-            if os.path.exists(file_path):
-                logging.warning(f"Arquivo existente encontrado: {file_name}. Opção de sobrescrever ou adicionar será necessária.")
-
-            with open(file_path, 'w') as f:
-                json.dump({"data": encrypted_data}, f)
+            with self._write_lock:
+                self.ensure_manifest()
+                self._write_base(df, data_type, selected_date)
+                self._replace_fingerprints(data_type, selected_date, self._fingerprints(df, data_type))
+                self._replace_totals(data_type, selected_date, self._contributions(df, data_type))
 
             logging.info(f"Dados de {data_type} para {selected_date} salvos com sucesso.")
         except Exception as e:
             logging.error(f"Erro ao salvar dados criptografados: {e}")
 
-    def append_data(self, file_path, new_data):
+    def _write_base(self, df, data_type, selected_date):
+        """
+        Grava o arquivo base de uma partição e o registra no manifesto, substituindo a partição.
+        """
+        file_name = f"{data_type}_{selected_date}.json"
+        file_path = os.path.join(self.storage_path, file_name)
+
+        if os.path.exists(file_path):
+            logging.warning(f"Arquivo existente encontrado: {file_name}. Opção de sobrescrever ou adicionar será necessária.")
+
+        content = self._write_encrypted(df, file_path)
+        min_date, max_date = self._payment_date_range(df)
+        self._record_partition(data_type, selected_date, file_name, len(df), min_date, max_date,
+                               len(content), hashlib.sha256(content).hexdigest())
+
+    def _write_segment(self, df, data_type, selected_date, entry):
+        """
+        Grava um segmento (<tipo>_<yyyy-MM>.seg<NNNNN>.json) e o registra na partição do manifesto.
+        """
+        sequence = len(entry.get("segmentos", [])) + 1
+        file_name = f"{data_type}_{selected_date}.seg{sequence:05d}.json"
+        file_path = os.path.join(self.storage_path, file_name)
+        content = self._write_encrypted(df, file_path)
+
+        min_date, max_date = self._payment_date_range(df)
+        self.manifest.add_segment(data_type, selected_date, file_name, len(df), min_date, max_date,
+                                  len(content), hashlib.sha256(content).hexdigest())
+
+    def ensure_manifest(self):
+        """
+        Garante que partições anteriores ao manifesto estejam registradas nele.
+        Enquanto isso não for possível (ex.: partições que não descriptografam com esta chave),
+        as gravações são recusadas: um manifesto criado só com a nova partição esconderia as demais.
+        :raises ValueError: Se o manifesto ausente não puder ser reconstruído.
+        """
+        if self.manifest.exists():
+            return
+        if not DataReader(self.encryption_key, self.storage_path, cache=None).ensure_manifest():
+            raise ValueError("Manifesto de partições ausente e não reconstruído; verifique a chave de criptografia.")
+
+    def _record_partition(self, data_type, selected_date, file_name, rows, min_date, max_date, size, checksum):
+        """
+        Registra no manifesto um arquivo base recém-gravado e descarta os arquivos antigos.
+        Os arquivos antigos só são removidos depois que o manifesto passa a apontar para o novo.
+        """
+        with self._write_lock:
+            previous = self.manifest.get(data_type, selected_date)
+            self.manifest.record(data_type, selected_date, file_name, rows, min_date, max_date, size, checksum)
+            partition_cache.invalidate(os.path.join(self.storage_path, file_name))
+
+            # Segmentos (e a geração anterior do arquivo base) deixam de fazer parte da partição
+            if previous:
+                obsolete = previous.get("segmentos", [])
+                if previous["arquivo"] != file_name:
+                    obsolete = [{"arquivo": previous["arquivo"]}] + obsolete
+                self._remove_segment_files(obsolete)
+
+    @staticmethod
+    def _payment_date_range(df):
+        """
+        Retorna as datas mínima e máxima de pagamento ("yyyy-MM-dd") de um DataFrame.
         """
-        Adiciona novos dados ao arquivo existente.
-        :param file_path: Caminho do arquivo existente.
+        if df.empty or 'Data Pagamento' not in df.columns:
+            return None, None
+        dates = parse_dates(df['Data Pagamento']).dropna()
+        if dates.empty:
+            return None, None
+        return dates.min().strftime('%Y-%m-%d'), dates.max().strftime('%Y-%m-%d')
+
+    def append_data(self, data_type, selected_date, new_data):
+        """
+        Adiciona novos dados a uma partição sem regravar os dados existentes.
+        Apenas as novas linhas são criptografadas, em um segmento próprio
+        (<tipo>_<yyyy-MM>.seg<NNNNN>.json) que os leitores combinam com o arquivo base.
+        Linhas cuja impressão digital já existe na partição são ignoradas.
+        :param data_type: Tipo de dado (custos, receitas, programados).
+        :param selected_date: Data no formato "yyyy-MM".
         :param new_data: Dados novos a serem adicionados.
         """
         try:
-            existing_data = self.load_encrypted_data(file_path)
-            combined_data = pd.concat([existing_data, new_data], ignore_index=True)
-            self.save_encrypted_data(combined_data, file_path)
-            logging.info("Novos dados adicionados com sucesso.")
+            with self._write_lock:
+                self.ensure_manifest()
+                entry = self.manifest.get(data_type, selected_date)
+                if entry is None:
+                    self.save_encrypted_data(new_data, data_type, selected_date)
+                    return
+
+                known = self.load_fingerprints(data_type, selected_date)
+                fingerprints = self._fingerprints(new_data, data_type)
+                is_new = [fingerprint not in known for fingerprint in fingerprints]
+                new_data = new_data[is_new]
+                self.last_import_report = {"novas": len(new_data), "duplicadas": len(is_new) - len(new_data)}
+                if new_data.empty:
+                    logging.info(f"Nenhuma linha nova para {data_type} em {selected_date}; todas já importadas.")
+                    return
+
+                self._write_segment(new_data, data_type, selected_date, entry)
+                known.update(fingerprint for fingerprint, new in zip(fingerprints, is_new) if new)
+                self._save_fingerprints(data_type, selected_date, known)
+                self.running_totals.add(f"{data_type}_{selected_date}", selected_date, DATA_TYPE_TIPOS[data_type],
+                                        self._contributions(new_data, data_type))
+            logging.info(f"{self.last_import_report['novas']} linhas adicionadas em {data_type} para {selected_date} "
+                         f"({self.last_import_report['duplicadas']} duplicadas ignoradas).")
+        except Exception as e:
+            logging.error(f"Erro ao adicionar dados em {data_type} para {selected_date}: {e}")
+
+    def compact_partition(self, data_type, selected_date):
+        """
+        Combina o arquivo base e os segmentos de uma partição em um único arquivo.
+        O resultado é gravado em uma nova geração do arquivo base (<tipo>_<yyyy-MM>.c<NNNNN>.json) e
+        a troca no manifesto é o ponto de confirmação: um leitor concorrente, ou uma interrupção,
+        vê a partição antiga (base e segmentos) ou a compactada, nunca as duas.
+        """
+        try:
+            with self._write_lock:
+                entry = self.manifest.get(data_type, selected_date)
+                if entry is None or not entry.get("segmentos"):
+                    return
+
+                frames = [self.load_encrypted_data(os.path.join(self.storage_path, file_name))
+                          for file_name in PartitionManifest.files(entry)]
+                combined_data = categorize(pd.concat([frame for frame in frames if not frame.empty], ignore_index=True))
+                if len(combined_data) != entry["linhas"]:
+                    logging.error(f"Compactação cancelada para {data_type}_{selected_date}: segmentos ilegíveis.")
+                    return
+
+                # As linhas não mudam: impressões digitais e totais da partição continuam válidos
+                generation = re.search(r"\.c(\d{5})\.json$", entry["arquivo"])
+                generation = int(generation.group(1)) + 1 if generation else 1
+                file_name = f"{data_type}_{selected_date}.c{generation:05d}.json"
+                content = self._write_encrypted(combined_data, os.path.join(self.storage_path, file_name))
+                min_date, max_date = self._payment_date_range(combined_data)
+                self._record_partition(data_type, selected_date, file_name, len(combined_data), min_date, max_date,
+                                       len(content), hashlib.sha256(content).hexdigest())
+            logging.info(f"Partição {data_type}_{selected_date} compactada ({len(entry['segmentos'])} segmentos).")
+        except Exception as e:
+            logging.error(f"Erro ao compactar partição {data_type}_{selected_date}: {e}")
+
+    def compact_partitions(self, min_segments=4):
+        """
+        Compacta todas as partições com pelo menos min_segments segmentos.
+        """
+        for data_type in REQUIRED_COLUMNS:
+            for selected_date, entry in self.manifest.select(data_type):
+                if len(entry.get("segmentos", [])) >= min_segments:
+                    self.compact_partition(data_type, selected_date)
+
+    def compact_in_background(self, min_segments=4):
+        """
+        Executa compact_partitions em uma thread separada.
+        :return: Thread iniciada.
+        """
+        thread = threading.Thread(target=self.compact_partitions, args=(min_segments,), daemon=True)
+        thread.start()
+        return thread
+
+    def _remove_segment_files(self, segments):
+        """
+        Remove do disco os arquivos (segmentos ou bases antigas) que não pertencem mais a uma partição.
+        """
+        for segment in segments:
+            file_path = os.path.join(self.storage_path, segment["arquivo"])
+            try:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                partition_cache.invalidate(file_path)
+            except Exception as e:
+                logging.error(f"Erro ao remover segmento {file_path}: {e}")
+
+    @staticmethod
+    def _fingerprints(df, data_type, counter=None):
+        """
+        Calcula as impressões digitais das linhas processadas de um tipo de dado.
+        :param counter: OccurrenceCounter compartilhado com outras partes da mesma fonte.
+        """
+        return fingerprint_frame(df, FINGERPRINT_COLUMNS[data_type], counter=counter)
+
+    def _fingerprint_path(self, data_type, selected_date):
+        return os.path.join(self.storage_path, f"{data_type}_{selected_date}.fingerprints.json")
+
+    def _read_fingerprints(self, data_type, selected_date):
+        """
+        Lê o índice gravado de uma partição.
+        :return: Conjunto de impressões, ou None se o índice não existe, é de outra versão ou não pôde ser lido.
+        """
+        file_path = self._fingerprint_path(data_type, selected_date)
+        if not os.path.exists(file_path):
+            return None
+        try:
+            with open(file_path, 'r') as f:
+                stored = json.load(f)
+            if stored.get("versao", 1) != FINGERPRINT_VERSION:
+                return None
+            fernet = Fernet(self.encryption_key)
+            return set(json.loads(fernet.decrypt(stored["data"].encode())))
         except Exception as e:
-            logging.error(f"Erro ao adicionar dados ao arquivo {file_path}: {e}")
+            logging.error(f"Erro ao carregar impressões digitais de {data_type} para {selected_date}: {e}")
+            return None
+
+    def load_fingerprints(self, data_type, selected_date):
+        """
+        Carrega o índice (conjunto) de impressões digitais de uma partição.
+        Índices ausentes (partições anteriores às impressões), ilegíveis ou de outra versão são
+        recalculados a partir dos dados da partição e gravados.
+        :raises: Erro de leitura da partição, se o índice precisar ser recalculado e ela não puder ser lida.
+        """
+        fingerprints = self._read_fingerprints(data_type, selected_date)
+        if fingerprints is not None:
+            return fingerprints
+        entry = self.manifest.get(data_type, selected_date)
+        if entry is None:
+            return set()
+
+        # Uma única numeração de repetições para o arquivo base e os segmentos, em ordem
+        counter = OccurrenceCounter()
+        fingerprints = set()
+        for file_name in PartitionManifest.files(entry):
+            df = _decrypt_partition(self.encryption_key, os.path.join(self.storage_path, file_name))
+            fingerprints.update(self._fingerprints(df, data_type, counter))
+        self._save_fingerprints(data_type, selected_date, fingerprints)
+        logging.info(f"Impressões digitais de {data_type} para {selected_date} recalculadas a partir da partição.")
+        return fingerprints
+
+    def ensure_fingerprints(self):
+        """
+        Calcula os índices de impressões das partições que ainda não os têm (gravadas antes das
+        impressões), para que reimportações dessas partições não dupliquem linhas.
+        Índices de versões anteriores são recalculados na próxima adição à partição.
+        """
+        with self._write_lock:
+            for data_type in REQUIRED_COLUMNS:
+                for selected_date, _ in self.manifest.select(data_type, skip_empty=False):
+                    if os.path.exists(self._fingerprint_path(data_type, selected_date)):
+                        continue
+                    try:
+                        self.load_fingerprints(data_type, selected_date)
+                    except Exception as e:
+                        logging.error(f"Impressões digitais de {data_type} para {selected_date} não recalculadas: {e}")
+
+    def _save_fingerprints(self, data_type, selected_date, fingerprints):
+        """
+        Grava, criptografado, o índice de impressões digitais de uma partição.
+        """
+        fernet = Fernet(self.encryption_key)
+        encrypted_data = fernet.encrypt(json.dumps(sorted(fingerprints)).encode()).decode()
+        with open(self._fingerprint_path(data_type, selected_date), 'w') as f:
+            json.dump({"versao": FINGERPRINT_VERSION, "data": encrypted_data}, f)
+
+    def _replace_fingerprints(self, data_type, selected_date, fingerprints):
+        """
+        Substitui o índice de uma partição regravada, registrando quantas linhas já existiam.
+        """
+        known = self._read_fingerprints(data_type, selected_date) or set()
+        duplicates = sum(1 for fingerprint in fingerprints if fingerprint in known)
+        self.last_import_report = {"novas": len(fingerprints) - duplicates, "duplicadas": duplicates}
+        self._save_fingerprints(data_type, selected_date, fingerprints)
+
+    @staticmethod
+    def _contributions(df, data_type):
+        """
+        Resume as linhas processadas em {categoria: [soma em centavos, contagem]} para os totais acumulados.
+        """
+        return RunningTotals.contributions(df, FINGERPRINT_COLUMNS[data_type][1])
+
+    def ensure_running_totals(self):
+        """
+        Calcula os totais acumulados a partir das partições existentes se eles ainda não
+        foram gravados (armazenamentos anteriores aos totais), uma partição por vez.
+        Se alguma partição não puder ser lida (ex.: chave errada), nada é gravado: ela seria
+        contada como vazia e os totais ficariam zerados para sempre.
+        """
+        with self._write_lock:
+            if self.running_totals.exists():
+                return
+            contributions = []
+            for data_type in REQUIRED_COLUMNS:
+                for selected_date, entry in self.manifest.select(data_type, skip_empty=False):
+                    partition_totals = {}
+                    for file_name in PartitionManifest.files(entry):
+                        file_path = os.path.join(self.storage_path, file_name)
+                        try:
+                            df = _decrypt_partition(self.encryption_key, file_path)
+                        except Exception as e:
+                            logging.error(f"Totais acumulados não reconstruídos: erro ao ler {file_path}: {e}")
+                            return
+                        for category, (total, count) in self._contributions(df, data_type).items():
+                            current = partition_totals.get(category, [0, 0])
+                            partition_totals[category] = [current[0] + total, current[1] + count]
+                    contributions.append((f"{data_type}_{selected_date}", selected_date,
+                                          DATA_TYPE_TIPOS[data_type], partition_totals))
+            self.running_totals.rebuild(contributions)
+            if contributions:
+                logging.info(f"Totais acumulados reconstruídos a partir de {len(contributions)} partições.")
+
+    def _replace_totals(self, data_type, selected_date, contributions):
+        """
+        Substitui nos totais acumulados a contribuição de uma partição regravada.
+        """
+        self.running_totals.replace(f"{data_type}_{selected_date}", selected_date,
+                                    DATA_TYPE_TIPOS[data_type], contributions)
 
     def load_encrypted_data(self, file_path):
         """
@@ -178,11 +895,7 @@ class ExcelImporter:
         :param file_path: Caminho do arquivo.
         """
         try:
-            with open(file_path, 'r') as f:
-                encrypted_data = json.load(f)["data"]
-                fernet = Fernet(self.encryption_key)
-                decrypted_data = fernet.decrypt(encrypted_data.encode()).decode()
-                return pd.read_json(decrypted_data)
+            return _decrypt_partition(self.encryption_key, file_path)
         except Exception as e:
             logging.error(f"Erro ao carregar dados do arquivo {file_path}: {e}")
             return pd.DataFrame()
@@ -1,8 +1,10 @@
 import pandas as pd
 import logging
 import json
-from sklearn.linear_model import LinearRegression
 import numpy as np
+from KeywordMatcher import KeywordMatcher
+from AggregateCube import get_cube
+from ForecastEngine import fit_linear_trends, predict_linear_trends
 
 # Configuração de log
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,37 +15,62 @@ class FinancialAnalyzer:
         self.user_defined_keywords = {}
         self.budget_targets = {}  # Armazena metas por centro de custo
 
+        # Autômato de palavras-chave, reconstruído apenas quando as palavras mudam
+        self._keyword_matcher = None
+        self._keyword_signature = None
+
     def classify_costs(self, df: pd.DataFrame):
         """
         Classifica custos como investimentos ou operacionais com base em palavras-chave.
+        Cada fornecedor distinto é classificado uma única vez e o resultado é aplicado às linhas.
         Solicita ao usuário classificar itens desconhecidos.
         """
-        df['Categoria'] = df['Fornecedor'].apply(self._categorize_cost)
+        self._refresh_keyword_matcher()
+        categories = {fornecedor: self._categorize_cost(fornecedor) for fornecedor in df['Fornecedor'].dropna().unique()}
+        df['Categoria'] = df['Fornecedor'].map(categories)
         return df
 
-    def _categorize_cost(self, fornecedor):
-        # Verificar palavras-chave conhecidas
-        for keyword in self.investment_keywords:
-            if keyword.lower() in fornecedor.lower():
-                return 'Investimento'
+    def _refresh_keyword_matcher(self):
+        """
+        Reconstrói o autômato se as palavras-chave foram alteradas desde a última classificação.
+        """
+        signature = (tuple(self.investment_keywords), tuple(self.user_defined_keywords.items()))
+        if signature != self._keyword_signature:
+            self._keyword_matcher = None
+            self._keyword_signature = signature
 
-        # Verificar palavras-chave definidas pelo usuário
-        for keyword, category in self.user_defined_keywords.items():
-            if keyword.lower() in fornecedor.lower():
-                return category
+    def _get_keyword_matcher(self):
+        """
+        Precedência: palavras de investimento, depois as definidas pelo usuário, na ordem de cadastro.
+        """
+        if self._keyword_matcher is None:
+            keywords = [(keyword, 'Investimento') for keyword in self.investment_keywords]
+            keywords += list(self.user_defined_keywords.items())
+            self._keyword_matcher = KeywordMatcher(keywords)
+        return self._keyword_matcher
+
+    def _categorize_cost(self, fornecedor):
+        # Verificar palavras-chave conhecidas e definidas pelo usuário
+        category = self._get_keyword_matcher().match(fornecedor)
+        if category is not None:
+            return category
 
         # Solicitar classificação para itens desconhecidos
         logging.warning(f"Fornecedor desconhecido: {fornecedor}. Solicitação ao usuário necessária.")
         category = input(f"Classifique o fornecedor '{fornecedor}' (Investimento/Operacional): ").strip()
         self.user_defined_keywords[fornecedor.lower()] = category
+        self._keyword_matcher = None
+        self._keyword_signature = None
         return category
 
     def analyze_profitability(self, df: pd.DataFrame):
         """
         Analisa a lucratividade da empresa com base em receitas e custos.
+        Aceita o DataFrame bruto ou um AggregateCube já construído.
         """
-        total_revenue = df[df['Tipo'] == 'Receita']['Valor'].sum()
-        total_cost = df[df['Tipo'] == 'Custo']['Valor'].sum()
+        cube = get_cube(df)
+        total_revenue = cube.total(Tipo='Receita')
+        total_cost = cube.total(Tipo='Custo')
         profit = total_revenue - total_cost
         margin = (profit / total_revenue) * 100 if total_revenue > 0 else 0
 
@@ -58,8 +85,9 @@ class FinancialAnalyzer:
         """
         Identifica líderes de custos e receitas.
         """
-        top_costs = df[df['Tipo'] == 'Custo'].groupby('Fornecedor')['Valor'].sum().nlargest(5)
-        top_revenues = df[df['Tipo'] == 'Receita'].groupby('Cliente')['Valor'].sum().nlargest(5)
+        cube = get_cube(df)
+        top_costs = cube.top('Fornecedor', 5, Tipo='Custo')
+        top_revenues = cube.top('Cliente', 5, Tipo='Receita')
 
         return {
             'Líderes de Custo': top_costs,
@@ -70,38 +98,27 @@ class FinancialAnalyzer:
         """
         Detecta tendências em receitas e custos ao longo do tempo.
         """
-        df['MesAno'] = pd.to_datetime(df['Data Pagamento']).dt.to_period('M')
-        trend = df.groupby(['MesAno', 'Tipo'])['Valor'].sum().unstack().fillna(0)
+        trend = get_cube(df).monthly('Tipo').rename_axis('MesAno')
         return trend
 
     def forecast(self, df: pd.DataFrame):
         """
         Faz previsão de receitas e custos futuros com base em séries temporais.
         """
-        df['MesAno'] = pd.to_datetime(df['Data Pagamento']).dt.to_period('M').dt.to_timestamp()
-        trend = df.groupby(['MesAno', 'Tipo'])['Valor'].sum().unstack().fillna(0)
-
-        forecasts = {}
-        for column in trend.columns:
-            x = np.arange(len(trend)).reshape(-1, 1)
-            y = trend[column].values
-
-            model = LinearRegression()
-            model.fit(x, y)
-
-            future_x = np.array([[len(trend) + i] for i in range(1, 4)])  # Prever próximos 3 períodos
-            future_y = model.predict(future_x)
+        trend = get_cube(df).monthly('Tipo')
 
-            forecasts[column] = future_y
+        # Ajusta todas as séries de uma vez e prevê os próximos 3 períodos
+        slope, intercept, _ = fit_linear_trends(trend.values)
+        future_y = predict_linear_trends(slope, intercept, np.arange(len(trend) + 1, len(trend) + 4))
 
-        return forecasts
+        return {column: future_y[:, index] for index, column in enumerate(trend.columns)}
 
     def analyze_budget(self, df: pd.DataFrame):
         """
         Analisa o orçamento previsto para centros de custo e receita.
         """
         results = []
-        grouped = df.groupby('Categoria')['Valor'].sum()
+        grouped = get_cube(df).total('Categoria')
 
         for category, spent in grouped.items():
             budget = self.budget_targets.get(category, None)
@@ -1,8 +1,9 @@
 import logging
 import pandas as pd
 
-from sklearn.linear_model import LinearRegression
 import numpy as np
+from AggregateCube import get_cube
+from ForecastEngine import fit_linear_trends, predict_linear_trends
 
 # Configuração de log
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,12 +15,11 @@ class FinancialProcessor:
     def calculate_growth_indices(self, df: pd.DataFrame, data_type: str):
         """
         Calcula índices de crescimento para custos ou receitas.
-        :param df: DataFrame contendo os dados financeiros.
+        :param df: DataFrame contendo os dados financeiros (ou um AggregateCube já construído).
         :param data_type: Tipo de dado para o índice ('custos' ou 'receitas').
         """
         try:
-            df['AnoMes'] = pd.to_datetime(df['Data Pagamento']).dt.to_period('M')
-            grouped = df.groupby('AnoMes')['Valor'].sum()
+            grouped = get_cube(df).monthly().rename_axis('AnoMes')
 
             growth_indices = grouped.pct_change() * 100  # Calcula a variação percentual mês a mês
             growth_indices = growth_indices.fillna(0).round(2)  # Preenche valores NaN e arredonda
@@ -36,7 +36,7 @@ class FinancialProcessor:
         :param df: DataFrame contendo os dados financeiros.
         """
         try:
-            grouped = df.groupby('Categoria')['Valor'].sum()
+            grouped = get_cube(df).total('Categoria')
             results = []
 
             for category, spent in grouped.items():
@@ -64,21 +64,12 @@ class FinancialProcessor:
         :param df: DataFrame contendo os dados financeiros.
         """
         try:
-            df['AnoMes'] = pd.to_datetime(df['Data Pagamento']).dt.to_period('M').dt.to_timestamp()
-            grouped = df.groupby(['AnoMes', 'Tipo'])['Valor'].sum().unstack(fill_value=0)
-
-            forecasts = {}
-            for column in grouped.columns:
-                x = np.arange(len(grouped)).reshape(-1, 1)
-                y = grouped[column].values
-
-                model = LinearRegression()
-                model.fit(x, y)
-
-                future_x = np.array([[len(grouped) + i] for i in range(1, 4)])  # Prever próximos 3 meses
-                future_y = model.predict(future_x)
+            grouped = get_cube(df).monthly('Tipo')
 
-                forecasts[column] = future_y.round(2)
+            # Ajusta todas as séries de uma vez e prevê os próximos 3 meses
+            slope, intercept, _ = fit_linear_trends(grouped.values)
+            future_y = predict_linear_trends(slope, intercept, np.arange(len(grouped) + 1, len(grouped) + 4))
+            forecasts = {column: future_y[:, index].round(2) for index, column in enumerate(grouped.columns)}
 
             logging.info("Previsão de fluxo de caixa concluída.")
             return forecasts
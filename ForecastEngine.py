@@ -0,0 +1,96 @@
+import logging
+import numpy as np
+import pandas as pd
+from DataSchema import parse_dates
+
+def fit_linear_trends(values, x=None):
+    """
+    Ajusta, de uma só vez, uma reta de mínimos quadrados para cada coluna de uma matriz.
+    Valores ausentes (NaN) são ignorados apenas na série em que ocorrem.
+    :param values: Matriz (períodos × séries).
+    :param x: Posição de cada período no tempo (padrão: 0, 1, 2, ...).
+    :return: Tupla (inclinações, interceptos, pontos usados), um valor por série.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    x = np.arange(values.shape[0], dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    mask = ~np.isnan(values)
+    weights = mask.astype(float)
+    y = np.where(mask, values, 0.0)
+    xs = x.reshape(-1, 1)
+
+    n = weights.sum(axis=0)
+    sum_x = (weights * xs).sum(axis=0)
+    sum_y = y.sum(axis=0)
+    sum_xx = (weights * xs * xs).sum(axis=0)
+    sum_xy = (y * xs).sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        denominator = n * sum_xx - sum_x ** 2
+        slope = np.where(denominator > 0, (n * sum_xy - sum_x * sum_y) / denominator, 0.0)
+        intercept = np.where(n > 0, (sum_y - slope * sum_x) / n, np.nan)
+    return slope, intercept, n
+
+def predict_linear_trends(slope, intercept, future_x):
+    """
+    Avalia as retas ajustadas nas posições futuras.
+    :return: Matriz (posições futuras × séries).
+    """
+    future_x = np.asarray(future_x, dtype=float).reshape(-1, 1)
+    return future_x * slope + intercept
+
+class ForecastEngine:
+    def __init__(self, horizon=3, missing="zero"):
+        """
+        Previsão linear vetorizada para milhares de séries mensais simultaneamente.
+        :param horizon: Quantidade de meses previstos após o último mês observado.
+        :param missing: Tratamento de meses sem dados em uma série: "skip" ignora o mês
+                        no ajuste; "zero" considera valor zero.
+        """
+        if missing not in ("skip", "zero"):
+            raise ValueError(f"Tratamento de meses ausentes inválido: {missing}")
+        self.horizon = horizon
+        self.missing = missing
+
+    def forecast_matrix(self, matrix: pd.DataFrame):
+        """
+        Prevê todas as colunas de uma matriz mês × série.
+        :param matrix: DataFrame com PeriodIndex mensal e uma coluna por série.
+        :return: DataFrame organizado com as colunas 'Serie', 'Mes' e 'Previsao'.
+        """
+        if matrix.empty:
+            return pd.DataFrame(columns=['Serie', 'Mes', 'Previsao'])
+
+        # Meses sem nenhum dado ainda ocupam sua posição no tempo
+        months = pd.period_range(matrix.index.min(), matrix.index.max(), freq='M')
+        matrix = matrix.reindex(months)
+        if self.missing == "zero":
+            matrix = matrix.fillna(0)
+
+        slope, intercept, _ = fit_linear_trends(matrix.values)
+        future_x = np.arange(len(months), len(months) + self.horizon)
+        predictions = predict_linear_trends(slope, intercept, future_x)
+        future_months = pd.period_range(months[-1] + 1, periods=self.horizon, freq='M')
+
+        return pd.DataFrame({
+            'Serie': np.tile(matrix.columns.to_numpy(), self.horizon),
+            'Mes': np.repeat(future_months.to_numpy(), len(matrix.columns)),
+            'Previsao': predictions.reshape(-1),
+        })
+
+    def forecast(self, df: pd.DataFrame, by, value_column='Valor', date_column='Data Pagamento'):
+        """
+        Prevê os totais mensais de cada valor distinto de uma coluna (categoria, fornecedor, veículo...).
+        :param df: DataFrame com os dados brutos.
+        :param by: Coluna que identifica as séries.
+        :return: DataFrame organizado com as colunas 'Serie', 'Mes' e 'Previsao'.
+        """
+        try:
+            months = parse_dates(df[date_column]).dt.to_period('M')
+            matrix = df[value_column].groupby([months.rename('Mes'), df[by].rename('Serie')]).sum().unstack()
+            return self.forecast_matrix(matrix)
+        except Exception as e:
+            logging.error(f"Erro ao prever séries por {by}: {e}")
+            return pd.DataFrame(columns=['Serie', 'Mes', 'Previsao'])
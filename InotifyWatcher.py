@@ -0,0 +1,105 @@
+import os
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+
+# Eventos de arquivo do Linux (inotify), acessados via ctypes sem dependências externas
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+EVENT_HEADER = struct.Struct("iIII")
+
+class InotifyWatcher:
+    def __init__(self, paths):
+        """
+        Observa diretórios (recursivamente) e informa quais arquivos mudaram, sem varreduras.
+        :param paths: Diretórios observados.
+        :raises OSError: Se o inotify não estiver disponível (sistemas não Linux).
+        """
+        library = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(library, use_errno=True) if library else None
+        if self._libc is None or not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify não disponível neste sistema.")
+
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "Falha ao iniciar o inotify.")
+        self._watches = {}
+        self.overflowed = False
+        for path in paths:
+            self._watch_tree(path)
+
+    def _watch_tree(self, path):
+        for root, dirs, files in os.walk(path):
+            self._add_watch(root)
+
+    def _add_watch(self, directory):
+        descriptor = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if descriptor < 0:
+            error = ctypes.get_errno()
+            if error != errno.ENOENT:
+                logging.warning(f"Não foi possível observar {directory}: {os.strerror(error)}")
+            return
+        self._watches[descriptor] = directory
+
+    def poll(self, timeout=0):
+        """
+        Aguarda até timeout segundos por eventos.
+        :return: Conjunto de caminhos de arquivos criados, alterados ou removidos. Se a fila
+                 do kernel transbordar, overflowed fica True e uma varredura completa é necessária.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                descriptor, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = buffer[offset:offset + length].rstrip(b"\0").decode(errors="surrogateescape")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    self.overflowed = True
+                    continue
+                if mask & IN_IGNORED:
+                    self._watches.pop(descriptor, None)
+                    continue
+                directory = self._watches.get(descriptor)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._watch_tree(path)
+                        changed.update(os.path.join(root, file) for root, _, files in os.walk(path) for file in files)
+                    continue
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
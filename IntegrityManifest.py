@@ -0,0 +1,132 @@
+import os
+import hmac
+import json
+import hashlib
+import logging
+
+def _leaf_hash(path, file_hash):
+    return hashlib.blake2b(b"\x00" + path.encode() + b"\x00" + file_hash.encode(), digest_size=32).digest()
+
+def _node_hash(left, right):
+    return hashlib.blake2b(b"\x01" + left + right, digest_size=32).digest()
+
+class MerkleTree:
+    def __init__(self, file_hashes):
+        """
+        Árvore de Merkle sobre os hashes dos arquivos, em ordem de caminho.
+        A integridade de todo o conjunto é confirmada comparando apenas a raiz.
+        :param file_hashes: Dicionário {caminho: hash do conteúdo}.
+        """
+        self.paths = sorted(file_hashes)
+        level = [_leaf_hash(path, file_hashes[path]) for path in self.paths]
+        self.levels = [level]
+        while len(level) > 1:
+            # Um nó sem par sobe para o nível seguinte sem alteração
+            level = [_node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+                     for i in range(0, len(level), 2)]
+            self.levels.append(level)
+
+    @property
+    def root(self):
+        """
+        Hash raiz (hexadecimal); árvores vazias têm a raiz do conteúdo vazio.
+        """
+        if not self.paths:
+            return hashlib.blake2b(b"", digest_size=32).hexdigest()
+        return self.levels[-1][0].hex()
+
+    def diff(self, other):
+        """
+        Localiza as diferenças em relação a outra árvore.
+        Com o mesmo conjunto de caminhos, desce apenas pelos ramos cujo hash difere:
+        cada arquivo alterado é encontrado com O(log n) comparações.
+        :return: Dicionário com listas de caminhos 'alterados', 'adicionados' e 'removidos'.
+        """
+        if self.paths != other.paths:
+            mine, theirs = set(self.paths), set(other.paths)
+            common = sorted(mine & theirs)
+            mine_leaves = dict(zip(self.paths, self.levels[0]))
+            other_leaves = dict(zip(other.paths, other.levels[0]))
+            return {
+                "alterados": [path for path in common if mine_leaves[path] != other_leaves[path]],
+                "adicionados": sorted(mine - theirs),
+                "removidos": sorted(theirs - mine),
+            }
+
+        changed = []
+        if self.paths:
+            pending = [(len(self.levels) - 1, 0)]
+            while pending:
+                depth, index = pending.pop()
+                if self.levels[depth][index] == other.levels[depth][index]:
+                    continue
+                if depth == 0:
+                    changed.append(self.paths[index])
+                    continue
+                for child in (2 * index, 2 * index + 1):
+                    if child < len(self.levels[depth - 1]):
+                        pending.append((depth - 1, child))
+        return {"alterados": sorted(changed), "adicionados": [], "removidos": []}
+
+class IntegrityManifest:
+    VERSION = 1
+
+    def __init__(self, file_path, signing_key):
+        """
+        Manifesto persistido dos hashes e metadados dos arquivos monitorados, assinado com HMAC.
+        Ao reiniciar, apenas arquivos cujos metadados mudaram precisam ser lidos novamente.
+        :param file_path: Caminho do manifesto (fora dos diretórios monitorados).
+        :param signing_key: Chave da assinatura (ex.: a chave de criptografia da aplicação).
+        """
+        self.file_path = file_path
+        self.signing_key = signing_key.encode() if isinstance(signing_key, str) else signing_key
+
+    def _sign(self, payload):
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+        return hmac.new(self.signing_key, canonical, hashlib.sha256).hexdigest()
+
+    def load(self):
+        """
+        Carrega o manifesto e confere a assinatura e a raiz de Merkle.
+        :return: Tupla (hashes, metadados) por caminho, vazia se ausente ou inválido.
+        :raises ValueError: Se o manifesto existir mas tiver sido adulterado.
+        """
+        if not os.path.exists(self.file_path):
+            return {}, {}
+        with open(self.file_path, 'r') as f:
+            content = json.load(f)
+
+        signature = content.pop("assinatura", "")
+        if not hmac.compare_digest(signature, self._sign(content)):
+            raise ValueError(f"Assinatura inválida no manifesto de integridade: {self.file_path}")
+
+        files = content.get("arquivos", {})
+        hashes = {path: entry["hash"] for path, entry in files.items()}
+        if MerkleTree(hashes).root != content.get("raiz"):
+            raise ValueError(f"Raiz de Merkle inconsistente no manifesto de integridade: {self.file_path}")
+        stats = {path: tuple(entry["metadados"]) for path, entry in files.items()}
+        return hashes, stats
+
+    def save(self, file_hashes, file_stats):
+        """
+        Grava o manifesto de forma atômica.
+        :return: Raiz de Merkle gravada.
+        """
+        root = MerkleTree(file_hashes).root
+        payload = {
+            "versao": self.VERSION,
+            "raiz": root,
+            "arquivos": {path: {"hash": file_hash, "metadados": list(file_stats.get(path, ()))}
+                         for path, file_hash in file_hashes.items()},
+        }
+        payload["assinatura"] = self._sign(payload)
+
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(payload, f)
+        os.replace(temp_path, self.file_path)
+        logging.info(f"Manifesto de integridade gravado ({len(file_hashes)} arquivos, raiz {root[:16]}).")
+        return root
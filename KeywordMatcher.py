@@ -0,0 +1,71 @@
+from collections import deque
+
+class KeywordMatcher:
+    def __init__(self, keywords):
+        """
+        Autômato de Aho-Corasick para localizar várias palavras-chave em uma única passada.
+        O custo de cada busca depende do tamanho do texto, não da quantidade de palavras-chave.
+        :param keywords: Lista de pares (palavra-chave, valor) em ordem de precedência; quando
+                         várias palavras ocorrem no texto, vence a que aparece primeiro na lista.
+        """
+        self.values = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]  # Menor índice de precedência reconhecido em cada estado
+
+        for priority, (keyword, value) in enumerate(keywords):
+            self.values.append(value)
+            keyword = keyword.lower()
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                state = next_state
+            if self._best[state] is None:
+                self._best[state] = priority
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        """
+        Calcula os links de falha em largura e propaga a precedência das saídas.
+        """
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+
+                inherited = self._best[self._fail[next_state]]
+                if inherited is not None and (self._best[next_state] is None or inherited < self._best[next_state]):
+                    self._best[next_state] = inherited
+
+    def match(self, text):
+        """
+        Retorna o valor da palavra-chave de maior precedência contida no texto, ou None.
+        """
+        goto, fail, best_by_state = self._goto, self._fail, self._best
+        state = 0
+        best = None
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found = best_by_state[state]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return None if best is None else self.values[best]
@@ -0,0 +1,173 @@
+import os
+import re
+import json
+import logging
+import threading
+from copy import deepcopy
+from bisect import bisect_left, bisect_right
+
+# Nome esperado dos arquivos de partição: <tipo>_<yyyy-MM>.json, ou <tipo>_<yyyy-MM>.c<NNNNN>.json
+# para partições compactadas (cada compactação grava uma nova geração do arquivo base)
+PARTITION_PATTERN = re.compile(r"^([a-z]+)_(\d{4}-\d{2})(?:\.c\d{5})?\.json$")
+
+class PartitionManifest:
+    FILE_NAME = "manifest.json"
+
+    def __init__(self, storage_path="utils/data/"):
+        """
+        Índice das partições criptografadas, mantido pelo caminho de gravação.
+        Registra tipo, mês, quantidade de linhas, datas mínima e máxima de pagamento,
+        tamanho e checksum de cada partição, evitando listar o diretório nas leituras.
+        :param storage_path: Caminho de armazenamento dos dados processados.
+        """
+        self.storage_path = storage_path
+        self.manifest_path = os.path.join(storage_path, self.FILE_NAME)
+        self._lock = threading.Lock()
+        self._partitions = {}
+        self._months = {}
+        self._signature = None
+
+    def exists(self):
+        """
+        Indica se o manifesto já foi criado no diretório de armazenamento.
+        """
+        return os.path.exists(self.manifest_path)
+
+    def _refresh(self):
+        """
+        Recarrega o manifesto do disco se ele foi alterado por outra instância.
+        """
+        try:
+            stat = os.stat(self.manifest_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+
+        if signature == self._signature:
+            return
+
+        partitions = {}
+        if signature is not None:
+            try:
+                with open(self.manifest_path, 'r') as f:
+                    partitions = json.load(f).get("particoes", {})
+            except Exception as e:
+                logging.error(f"Erro ao carregar manifesto de partições: {e}")
+                partitions = {}
+
+        self._partitions = partitions
+        self._months = {data_type: sorted(entries) for data_type, entries in partitions.items()}
+        self._signature = signature
+
+    def _save(self):
+        """
+        Grava o manifesto de forma atômica (arquivo temporário + os.replace).
+        """
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({"versao": 1, "particoes": self._partitions}, f)
+        os.replace(temp_path, self.manifest_path)
+        stat = os.stat(self.manifest_path)
+        self._signature = (stat.st_mtime_ns, stat.st_size)
+
+    def record(self, data_type, selected_date, file_name, rows, min_date, max_date, size, checksum):
+        """
+        Registra ou atualiza uma partição no manifesto.
+        :param data_type: Tipo de dado (custos, receitas, programados).
+        :param selected_date: Mês da partição no formato "yyyy-MM".
+        :param file_name: Nome do arquivo da partição no diretório de armazenamento.
+        :param rows: Quantidade de linhas da partição.
+        :param min_date: Menor data de pagamento ("yyyy-MM-dd") ou None.
+        :param max_date: Maior data de pagamento ("yyyy-MM-dd") ou None.
+        :param size: Tamanho do arquivo em bytes.
+        :param checksum: SHA-256 do conteúdo gravado.
+        """
+        self.record_many([(data_type, selected_date, file_name, rows, min_date, max_date, size, checksum)])
+
+    def record_many(self, records):
+        """
+        Registra várias partições com uma única gravação do manifesto.
+        :param records: Tuplas com os parâmetros de record, na mesma ordem.
+        """
+        with self._lock:
+            self._refresh()
+            for data_type, selected_date, file_name, rows, min_date, max_date, size, checksum in records:
+                self._partitions.setdefault(data_type, {})[selected_date] = {
+                    "arquivo": file_name,
+                    "linhas": int(rows),
+                    "data_min": min_date,
+                    "data_max": max_date,
+                    "bytes": int(size),
+                    "checksum": checksum,
+                    "segmentos": [],
+                }
+                self._months[data_type] = sorted(self._partitions[data_type])
+            self._save()
+
+    def add_segment(self, data_type, selected_date, file_name, rows, min_date, max_date, size, checksum):
+        """
+        Registra um segmento adicionado a uma partição existente, atualizando os totais.
+        Os parâmetros seguem os de record, referentes apenas ao segmento.
+        """
+        with self._lock:
+            self._refresh()
+            entry = self._partitions.get(data_type, {}).get(selected_date)
+            if entry is None:
+                raise KeyError(f"Partição não registrada: {data_type}_{selected_date}")
+
+            entry.setdefault("segmentos", []).append({
+                "arquivo": file_name,
+                "linhas": int(rows),
+                "bytes": int(size),
+                "checksum": checksum,
+            })
+            entry["linhas"] += int(rows)
+            entry["bytes"] += int(size)
+            if min_date and (entry["data_min"] is None or min_date < entry["data_min"]):
+                entry["data_min"] = min_date
+            if max_date and (entry["data_max"] is None or max_date > entry["data_max"]):
+                entry["data_max"] = max_date
+            self._save()
+
+    @staticmethod
+    def files(entry):
+        """
+        Retorna os arquivos de uma partição: o arquivo base seguido dos segmentos, em ordem.
+        """
+        return [entry["arquivo"]] + [segment["arquivo"] for segment in entry.get("segmentos", [])]
+
+    def remove(self, data_type, selected_date):
+        """
+        Remove uma partição do manifesto.
+        """
+        with self._lock:
+            self._refresh()
+            if self._partitions.get(data_type, {}).pop(selected_date, None) is not None:
+                self._months[data_type] = sorted(self._partitions[data_type])
+                self._save()
+
+    def get(self, data_type, selected_date):
+        """
+        Retorna o registro de uma partição, ou None se ela não existir.
+        """
+        with self._lock:
+            self._refresh()
+            entry = self._partitions.get(data_type, {}).get(selected_date)
+            return deepcopy(entry) if entry else None
+
+    def select(self, data_type, start_date=None, end_date=None, skip_empty=True):
+        """
+        Seleciona as partições de um tipo dentro do intervalo de meses, por busca binária.
+        :param start_date: Mês inicial no formato "yyyy-MM" (inclusivo).
+        :param end_date: Mês final no formato "yyyy-MM" (inclusivo).
+        :param skip_empty: Ignora partições sem linhas.
+        :return: Lista de (mês, registro) em ordem cronológica.
+        """
+        with self._lock:
+            self._refresh()
+            months = self._months.get(data_type, [])
+            low = bisect_left(months, start_date[:7]) if start_date else 0
+            high = bisect_right(months, end_date[:7]) if end_date else len(months)
+            entries = self._partitions.get(data_type, {})
+            return [(month, deepcopy(entries[month])) for month in months[low:high]
+                    if not (skip_empty and entries[month]["linhas"] == 0)]
@@ -0,0 +1,177 @@
+import heapq
+import random
+import logging
+import threading
+import time
+
+class _Check:
+    def __init__(self, name, function, interval, jitter):
+        self.name = name
+        self.function = function
+        self.interval = interval
+        self.jitter = jitter
+        self.planned = 0.0  # Horário planejado, sem jitter: base dos próximos agendamentos
+        self.next_run = 0.0
+        self.runs = 0
+        self.failures = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = None
+        self.last_error = None
+        self.active = True
+
+class PeriodicScheduler:
+    def __init__(self, name="PeriodicScheduler"):
+        """
+        Executa verificações periódicas em uma única thread, em ordem de horário.
+        As verificações são cooperativas: cada execução deve terminar rapidamente, pois uma
+        execução longa atrasa as demais (e é contabilizada como estouro).
+        :param name: Nome da thread do agendador.
+        """
+        self.name = name
+        self._checks = {}
+        self._heap = []
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    def add(self, name, function, interval, jitter=0.0, run_immediately=True):
+        """
+        Agenda uma verificação (substitui outra de mesmo nome).
+        :param name: Nome da verificação, usado nas estatísticas.
+        :param function: Função sem argumentos executada a cada intervalo.
+        :param interval: Intervalo entre execuções, em segundos.
+        :param jitter: Atraso aleatório máximo somado a cada agendamento, para espalhar verificações.
+        :param run_immediately: Executa a primeira vez logo após o início, em vez de após um intervalo.
+        """
+        if interval <= 0:
+            raise ValueError(f"Intervalo inválido para a verificação {name}: {interval}")
+        with self._condition:
+            previous = self._checks.get(name)
+            if previous is not None:
+                previous.active = False
+            check = _Check(name, function, interval, jitter)
+            check.planned = time.monotonic() + (0.0 if run_immediately else interval)
+            check.next_run = check.planned + random.uniform(0, jitter)
+            self._checks[name] = check
+            self._push(check)
+            self._condition.notify()
+        return check
+
+    def remove(self, name):
+        with self._condition:
+            check = self._checks.pop(name, None)
+            if check is not None:
+                check.active = False
+
+    def _push(self, check):
+        self._sequence += 1
+        heapq.heappush(self._heap, (check.next_run, self._sequence, check))
+
+    def start(self):
+        """
+        Inicia a thread do agendador (daemon: não impede o encerramento do processo).
+        """
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=10.0):
+        """
+        Encerramento gracioso: nenhuma nova execução é iniciada e a execução em andamento
+        termina normalmente.
+        :return: True se a thread terminou dentro do prazo.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    if self._heap and not self._heap[0][2].active:
+                        heapq.heappop(self._heap)
+                        continue
+                    delay = self._heap[0][0] - time.monotonic() if self._heap else None
+                    if delay is not None and delay <= 0:
+                        break
+                    self._condition.wait(delay)
+                if self._stopping:
+                    return
+                _, _, check = heapq.heappop(self._heap)
+
+            self._execute(check)
+
+            with self._condition:
+                if check.active:
+                    self._reschedule(check)
+
+    def _execute(self, check):
+        start = time.perf_counter()
+        try:
+            check.function()
+        except Exception as e:
+            check.failures += 1
+            check.last_error = str(e)
+            logging.error(f"Erro na verificação periódica {check.name}: {e}")
+        elapsed = time.perf_counter() - start
+
+        check.runs += 1
+        check.last_time = elapsed
+        check.total_time += elapsed
+        check.max_time = max(check.max_time, elapsed)
+        if elapsed > check.interval:
+            check.overruns += 1
+            logging.warning(f"Verificação {check.name} levou {elapsed:.2f}s, acima do intervalo de {check.interval}s.")
+
+    def _reschedule(self, check):
+        """
+        Agenda a próxima execução a partir do horário planejado, sem acumular desvio: o jitter
+        é aplicado apenas ao horário de execução, nunca à base do agendamento seguinte.
+        Execuções perdidas por atraso são puladas, não enfileiradas.
+        """
+        now = time.monotonic()
+        planned = check.planned + check.interval
+        if planned <= now:
+            missed = int((now - planned) // check.interval) + 1
+            check.skipped += missed
+            planned += missed * check.interval
+        check.planned = planned
+        check.next_run = planned + random.uniform(0, check.jitter)
+        self._push(check)
+
+    def stats(self):
+        """
+        Estatísticas por verificação: execuções, falhas, tempos e estouros de intervalo.
+        """
+        with self._condition:
+            checks = list(self._checks.values())
+        return {
+            check.name: {
+                "intervalo (s)": check.interval,
+                "execuções": check.runs,
+                "falhas": check.failures,
+                "estouros": check.overruns,
+                "puladas": check.skipped,
+                "último (s)": round(check.last_time, 4) if check.last_time is not None else None,
+                "médio (s)": round(check.total_time / check.runs, 4) if check.runs else None,
+                "máximo (s)": round(check.max_time, 4),
+                "último erro": check.last_error,
+            }
+            for check in checks
+        }
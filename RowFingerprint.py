@@ -0,0 +1,105 @@
+import hashlib
+from datetime import date, datetime
+
+# Impressões digitais de linhas financeiras, usadas para evitar duplicatas em reimportações.
+# A impressão combina contraparte, data e valor normalizados com o número da
+# ocorrência da mesma combinação no lote: linhas idênticas legítimas dentro de uma planilha
+# são preservadas, e reimportar a mesma planilha gera exatamente as mesmas impressões.
+
+# Versão da fórmula das impressões; índices gravados com outra versão são recalculados
+# (versão 2: a categoria, derivada e editável, deixou de fazer parte da impressão)
+FINGERPRINT_VERSION = 2
+
+def normalize_text(value):
+    """
+    Normaliza textos: minúsculas e espaços colapsados.
+    """
+    if value is None or value != value:
+        return ""
+    return " ".join(str(value).split()).lower()
+
+def normalize_date(value):
+    """
+    Normaliza datas para "yyyy-MM-dd".
+    """
+    if value is None or value != value:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    return str(value).strip()[:10]
+
+def normalize_value(value):
+    """
+    Normaliza valores monetários com duas casas decimais.
+    """
+    try:
+        return f"{round(float(value), 2):.2f}"
+    except (TypeError, ValueError):
+        return ""
+
+def _digest(key, occurrence):
+    return hashlib.blake2b(f"{key}\x1f{occurrence}".encode(), digest_size=16).digest()
+
+class OccurrenceCounter:
+    def __init__(self):
+        """
+        Numeração de repetições de uma fonte. Compartilhada entre chamadas, faz uma fonte lida
+        em partes (blocos de uma planilha, arquivos de uma partição) gerar as mesmas impressões
+        que lida de uma vez.
+        """
+        self.seen = set()
+        self.repeated = {}
+
+def fingerprint_keys(keys, counter=None):
+    """
+    Gera as impressões de uma sequência de chaves já normalizadas, numerando repetições.
+    A numeração vale para uma fonte (cada chamada ou cada contador): apenas o resumo de 16 bytes
+    da primeira ocorrência de cada chave fica em memória, e contadores só para as chaves repetidas.
+    :param keys: Iterável de chaves normalizadas (uma por linha).
+    :param counter: OccurrenceCounter que continua a numeração de partes anteriores da mesma fonte.
+    :return: Gerador de impressões, na mesma ordem.
+    """
+    counter = counter if counter is not None else OccurrenceCounter()
+    seen = counter.seen
+    repeated = counter.repeated
+    for key in keys:
+        first = _digest(key, 0)
+        if first not in seen:
+            seen.add(first)
+            yield first.hex()
+            continue
+        occurrence = repeated.get(first, 0) + 1
+        repeated[first] = occurrence
+        yield _digest(key, occurrence).hex()
+
+def row_key(counterparty, payment_date, value):
+    """
+    Monta a chave normalizada de uma linha a partir dos campos de origem. A categoria fica de
+    fora: ela é derivada e pode mudar depois da importação sem que a linha deixe de ser a mesma.
+    """
+    return "\x1f".join((normalize_text(counterparty), normalize_date(payment_date), normalize_value(value)))
+
+def fingerprint_frame(df, counterparty_column, date_column='Data Pagamento', value_column='Valor', counter=None):
+    """
+    Calcula as impressões das linhas de um DataFrame.
+    Datas numéricas seguem parse_dates (números de série do Excel ou milissegundos).
+    :param counter: OccurrenceCounter compartilhado com outras partes da mesma fonte.
+    :return: Lista de impressões, na ordem das linhas.
+    """
+    import pandas as pd
+    from DataSchema import parse_dates
+
+    if df.empty:
+        return []
+
+    if counterparty_column in df.columns:
+        counterparties = df[counterparty_column].astype(object).fillna("").astype(str).str.split().str.join(" ").str.lower()
+    else:
+        counterparties = pd.Series("", index=df.index)
+
+    dates = parse_dates(df[date_column]).dt.strftime("%Y-%m-%d").fillna("")
+
+    values = df[value_column].map(normalize_value)
+
+    keys = counterparties + "\x1f" + dates + "\x1f" + values
+    return list(fingerprint_keys(keys, counter))
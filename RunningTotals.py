@@ -0,0 +1,202 @@
+import os
+import json
+import logging
+import threading
+import pandas as pd
+from cryptography.fernet import Fernet
+from DataSchema import to_cents
+
+# Rótulo de "todos" usado para os níveis agregados (todos os meses / todas as categorias)
+ALL = "*"
+
+# Valor de 'Tipo' correspondente a cada tipo de dado armazenado
+DATA_TYPE_TIPOS = {"custos": "Custo", "receitas": "Receita", "programados": "Programado"}
+
+class RunningTotals:
+    FILE_NAME = "totals.json"
+    VERSION = 2  # Versão 1 gravava as somas em reais (float); a 2, em centavos inteiros
+
+    def __init__(self, storage_path="utils/data/", encryption_key=None):
+        """
+        Totais acumulados (soma e contagem) por mês, Tipo e Categoria, atualizados a cada gravação.
+        Cada partição contribui separadamente, de modo que substituí-la ou removê-la corrige os
+        totais sem reler o histórico. As consultas são buscas diretas em dicionário. As somas são
+        mantidas em centavos inteiros, sem acúmulo de erro de arredondamento.
+        :param storage_path: Caminho de armazenamento dos dados processados.
+        :param encryption_key: Chave para gravar os totais criptografados (opcional).
+        """
+        self.file_path = os.path.join(storage_path, self.FILE_NAME)
+        self.encryption_key = encryption_key
+        self._lock = threading.RLock()
+        self._sources = {}
+        self._totals = {}
+        self._signature = None
+
+    def exists(self):
+        """
+        Indica se os totais já foram gravados (ou reconstruídos) neste armazenamento.
+        """
+        return os.path.exists(self.file_path)
+
+    @staticmethod
+    def contributions(df, category_column='Categoria'):
+        """
+        Resume um DataFrame em {categoria: [soma em centavos, contagem]}.
+        """
+        if df is None or df.empty:
+            return {}
+        categories = df[category_column].astype(object).fillna("Não categorizado") if category_column in df.columns \
+            else "Não categorizado"
+        frame = pd.DataFrame({'_categoria': categories, '_centavos': to_cents(df['Valor'])}, index=df.index)
+        grouped = frame.groupby('_categoria')['_centavos'].agg(['sum', 'count'])
+        return {str(category): [int(row['sum']), int(row['count'])] for category, row in grouped.iterrows()}
+
+    def _refresh(self):
+        """
+        Recarrega os totais se o arquivo foi alterado por outra instância.
+        """
+        try:
+            stat = os.stat(self.file_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        if signature == self._signature:
+            return
+
+        sources = {}
+        if signature is not None:
+            try:
+                with open(self.file_path, 'rb') as f:
+                    content = f.read()
+                if self.encryption_key:
+                    content = Fernet(self.encryption_key).decrypt(content)
+                stored = json.loads(content)
+                sources = stored["fontes"]
+                if stored.get("versao", 1) < 2:
+                    sources = self._reais_to_cents(sources)
+            except Exception as e:
+                logging.error(f"Erro ao carregar totais acumulados: {e}")
+
+        self._sources = sources
+        self._totals = {}
+        for source in sources.values():
+            for month, tipos in source.items():
+                for tipo, categories in tipos.items():
+                    for category, (total, count) in categories.items():
+                        self._bump(month, tipo, category, total, count)
+        self._signature = signature
+
+    @staticmethod
+    def _reais_to_cents(sources):
+        return {source: {month: {tipo: {category: [int(round(total * 100)), count]
+                                        for category, (total, count) in categories.items()}
+                                 for tipo, categories in tipos.items()}
+                         for month, tipos in months.items()}
+                for source, months in sources.items()}
+
+    def _save(self):
+        content = json.dumps({"versao": self.VERSION, "fontes": self._sources}).encode()
+        if self.encryption_key:
+            content = Fernet(self.encryption_key).encrypt(content)
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, self.file_path)
+        stat = os.stat(self.file_path)
+        self._signature = (stat.st_mtime_ns, stat.st_size)
+
+    def _bump(self, month, tipo, category, total, count):
+        """
+        Atualiza as quatro chaves afetadas: (mês, categoria), (mês, todas), (todos, categoria) e (todos, todas).
+        """
+        for key_month in (month, ALL):
+            for key_category in (category, ALL):
+                key = (key_month, tipo, key_category)
+                current = self._totals.get(key, (0, 0))
+                self._totals[key] = (current[0] + total, current[1] + count)
+
+    def _apply(self, source, month, tipo, contributions, sign):
+        bucket = self._sources.setdefault(source, {}).setdefault(month, {}).setdefault(tipo, {})
+        for category, (total, count) in contributions.items():
+            current = bucket.get(category, [0, 0])
+            bucket[category] = [current[0] + sign * total, current[1] + sign * count]
+            self._bump(month, tipo, category, sign * total, sign * count)
+
+    def add(self, source, month, tipo, contributions):
+        """
+        Soma novas linhas aos totais.
+        :param source: Identificador da origem (ex.: partição "custos_2024-01").
+        :param month: Mês no formato "yyyy-MM".
+        :param tipo: Tipo das linhas ('Custo', 'Receita', 'Programado').
+        :param contributions: Dicionário {categoria: [soma em centavos, contagem]} (ver contributions).
+        """
+        with self._lock:
+            self._refresh()
+            self._apply(source, month, tipo, contributions, 1)
+            self._save()
+
+    def replace(self, source, month, tipo, contributions):
+        """
+        Substitui toda a contribuição de uma origem (partição regravada).
+        """
+        with self._lock:
+            self._refresh()
+            self._remove_source(source)
+            self._apply(source, month, tipo, contributions, 1)
+            self._save()
+
+    def rebuild(self, contributions):
+        """
+        Substitui todos os totais de uma vez, com uma única gravação (mesmo sem dados, para
+        que a reconstrução não se repita).
+        :param contributions: Iterável de (origem, mês, Tipo, {categoria: [soma em centavos, contagem]}).
+        """
+        with self._lock:
+            self._sources = {}
+            self._totals = {}
+            for source, month, tipo, source_contributions in contributions:
+                self._apply(source, month, tipo, source_contributions, 1)
+            self._save()
+
+    def remove(self, source):
+        """
+        Remove a contribuição de uma origem (partição apagada).
+        """
+        with self._lock:
+            self._refresh()
+            self._remove_source(source)
+            self._save()
+
+    def _remove_source(self, source):
+        for month, tipos in self._sources.pop(source, {}).items():
+            for tipo, categories in tipos.items():
+                for category, (total, count) in categories.items():
+                    self._bump(month, tipo, category, -total, -count)
+
+    def total(self, tipo, month=ALL, category=ALL):
+        """
+        Retorna (soma em reais, contagem) de um Tipo, opcionalmente restrito a um mês e categoria.
+        """
+        with self._lock:
+            self._refresh()
+            cents, count = self._totals.get((month, tipo, category), (0, 0))
+            return cents / 100, count
+
+    def profitability(self, month=ALL):
+        """
+        Receita, custo, lucro e margem, no mesmo formato de FinancialAnalyzer.analyze_profitability.
+        """
+        with self._lock:
+            self._refresh()
+            revenue_cents = self._totals.get((month, 'Receita', ALL), (0, 0))[0]
+            cost_cents = self._totals.get((month, 'Custo', ALL), (0, 0))[0]
+        total_revenue = revenue_cents / 100
+        profit = (revenue_cents - cost_cents) / 100
+        margin = (profit / total_revenue) * 100 if total_revenue > 0 else 0
+
+        return {
+            'Receita Total': total_revenue,
+            'Custo Total': cost_cents / 100,
+            'Lucro': profit,
+            'Margem de Lucro (%)': margin
+        }
@@ -0,0 +1,179 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+# Marcadores enviados pela fila para a thread de gravação
+_STOP = object()
+
+class _Flush:
+    def __init__(self):
+        self.done = threading.Event()
+
+class SecurityEventLog:
+    def __init__(self, file_path, max_queue=10000, batch_size=256, flush_interval=1.0,
+                 max_bytes=10 * 1024 * 1024, backup_count=5):
+        """
+        Registro assíncrono de eventos de segurança em JSON lines, com data e hora (UTC).
+        Os eventos vão para uma fila limitada e uma thread os grava em lotes, sem que o
+        monitoramento espere pelo disco; com a fila cheia, o evento é descartado e contado.
+        :param file_path: Arquivo de log.
+        :param max_queue: Capacidade da fila de eventos pendentes.
+        :param batch_size: Quantidade de eventos que força uma gravação.
+        :param flush_interval: Intervalo máximo, em segundos, entre gravações de eventos pendentes.
+        :param max_bytes: Tamanho a partir do qual o arquivo é rotacionado (0 desativa).
+        :param backup_count: Quantidade de arquivos rotacionados mantidos (<arquivo>.1, .2, ...).
+        """
+        self.file_path = file_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.queue = queue.Queue(maxsize=max_queue)
+
+        self._stats_lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="SecurityEventLog", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, message, level="warning", **fields):
+        """
+        Enfileira um evento sem bloquear.
+        :param message: Descrição do evento.
+        :param level: Gravidade ('info', 'warning', 'error').
+        :param fields: Campos adicionais do evento (ex.: arquivo, ip).
+        :return: False se o evento foi descartado por fila cheia ou registro encerrado.
+        """
+        event = {"data_hora": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                 "nivel": level, "mensagem": message, **fields}
+        if self._closed:
+            return False
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            return False
+        with self._stats_lock:
+            self.enqueued += 1
+        return True
+
+    def flush(self, timeout=5.0):
+        """
+        Aguarda a gravação dos eventos enfileirados até agora.
+        :return: True se a gravação terminou dentro do prazo.
+        """
+        if self._closed:
+            return True
+        marker = _Flush()
+        try:
+            self.queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """
+        Grava os eventos pendentes e encerra a thread de gravação.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logging.error("Fila de eventos de segurança cheia ao encerrar o registro.")
+        self._thread.join(timeout)
+
+    def stats(self):
+        """
+        Contadores do registro: enfileirados, gravados, descartados, pendentes e rotações.
+        """
+        with self._stats_lock:
+            return {"enfileirados": self.enqueued, "gravados": self.written, "descartados": self.dropped,
+                    "pendentes": self.queue.qsize(), "rotacoes": self.rotations}
+
+    def _run(self):
+        """
+        Acumula eventos até completar batch_size ou até flush_interval após o primeiro evento
+        pendente, e então grava o lote; flush e close forçam a gravação imediata.
+        """
+        batch = []
+        markers = []
+        deadline = None
+        stop = False
+        while not stop:
+            # Sem eventos pendentes, aguarda o próximo sem prazo
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stop = True
+            elif isinstance(item, _Flush):
+                markers.append(item)
+            elif item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+
+            if batch and (stop or markers or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+                deadline = None
+            for marker in markers:
+                marker.done.set()
+            markers = []
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, events):
+        """
+        Grava um lote de eventos em uma única escrita, rotacionando o arquivo se necessário.
+        """
+        data = "".join(json.dumps(event, ensure_ascii=False, default=str) + "\n" for event in events).encode()
+        try:
+            if self._file is None:
+                self._file = open(self.file_path, 'ab')
+            if self.max_bytes and self._file.tell() and self._file.tell() + len(data) > self.max_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            with self._stats_lock:
+                self.written += len(events)
+        except Exception as e:
+            with self._stats_lock:
+                self.dropped += len(events)
+            logging.error(f"Erro ao gravar eventos de segurança: {e}")
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.file_path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.file_path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.file_path, f"{self.file_path}.1")
+        else:
+            os.remove(self.file_path)
+        self._file = open(self.file_path, 'ab')
+        with self._stats_lock:
+            self.rotations += 1
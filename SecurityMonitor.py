@@ -4,25 +4,115 @@ import threading
 import hashlib
 import time
 import socket
+from IntegrityManifest import IntegrityManifest, MerkleTree
+from SecurityEventLog import SecurityEventLog
+from PeriodicScheduler import PeriodicScheduler
 
 # Configuração de log
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class SecurityMonitor:
-    def __init__(self, data_paths):
+    def __init__(self, data_paths, incremental=True, use_inotify=False, scan_interval=30,
+                 buffer_size=1024 * 1024, signing_key=None, manifest_path=None, event_log_options=None,
+                 access_interval=10, event_interval=1.0, jitter=1.0, scheduler=None):
         """
         Monitoramento de segurança para proteger arquivos e detectar acessos não autorizados.
         :param data_paths: Lista de caminhos de dados para monitorar.
+        :param incremental: Recalcula o hash apenas de arquivos cujo tamanho, mtime ou inode mudou.
+        :param use_inotify: No Linux, reage a eventos de arquivo em vez de varrer a cada intervalo
+                            (uma varredura incremental ainda é feita a cada scan_interval).
+        :param scan_interval: Intervalo entre varreduras, em segundos.
+        :param buffer_size: Tamanho dos blocos lidos ao calcular hashes.
+        :param signing_key: Chave para assinar o manifesto de integridade persistido; sem ela,
+                            os hashes ficam apenas em memória.
+        :param manifest_path: Caminho do manifesto (padrão: ao lado do log de segurança).
+        :param event_log_options: Opções do registro assíncrono de eventos (ver SecurityEventLog).
+        :param access_interval: Intervalo entre verificações de acesso, em segundos.
+        :param event_interval: Intervalo de leitura dos eventos do inotify, em segundos.
+        :param jitter: Atraso aleatório máximo somado a cada agendamento, em segundos.
+        :param scheduler: PeriodicScheduler compartilhado; por padrão, um próprio do monitor.
         """
         self.data_paths = data_paths
         self.access_logs = "utils/security/logs.txt"
         self.lock = threading.Lock()
         self.file_hashes = {}
+        self.file_stats = {}  # Caminho -> (tamanho, mtime_ns, inode, ctime_ns) do último hash calculado
         self.blocked_ips = set()
+        self.incremental = incremental
+        self.use_inotify = use_inotify
+        self.scan_interval = scan_interval
+        self.buffer_size = buffer_size
+        self.access_interval = access_interval
+        self.event_interval = event_interval
+        self.jitter = jitter
+        self.last_scan_report = {}
+
+        # Todas as verificações periódicas rodam em uma única thread do agendador
+        self.scheduler = scheduler or PeriodicScheduler("SecurityMonitor")
+        self._watcher = None
 
         # Configuração inicial
         if not os.path.exists(os.path.dirname(self.access_logs)):
             os.makedirs(os.path.dirname(self.access_logs))
+        self.event_log = SecurityEventLog(self.access_logs, **(event_log_options or {}))
+
+        self.manifest = None
+        self._manifest_dirty = False
+        if signing_key is not None:
+            manifest_path = manifest_path or os.path.join(os.path.dirname(self.access_logs), "integrity_manifest.json")
+            self.manifest = IntegrityManifest(manifest_path, signing_key)
+            self.load_manifest()
+
+    def load_manifest(self):
+        """
+        Carrega hashes e metadados persistidos: após reiniciar, só arquivos alterados são relidos.
+        Um manifesto adulterado é descartado e todos os arquivos voltam a ser verificados.
+        """
+        try:
+            file_hashes, file_stats = self.manifest.load()
+        except Exception as e:
+            logging.error(f"Manifesto de integridade descartado: {e}")
+            self._log_security_event(f"Manifesto de integridade inválido: {e}", level="error",
+                                     tipo="manifesto_invalido", arquivo=self.manifest.file_path)
+            file_hashes, file_stats = {}, {}
+        with self.lock:
+            self.file_hashes = file_hashes
+            self.file_stats = file_stats
+
+    def save_manifest(self):
+        """
+        Grava o manifesto se houve alterações desde a última gravação.
+        :return: Raiz de Merkle atual, ou None sem manifesto.
+        """
+        if self.manifest is None:
+            return None
+        with self.lock:
+            if not self._manifest_dirty:
+                return None
+            file_hashes, file_stats = dict(self.file_hashes), dict(self.file_stats)
+            self._manifest_dirty = False
+        return self.manifest.save(file_hashes, file_stats)
+
+    def merkle_tree(self):
+        """
+        Árvore de Merkle dos hashes conhecidos.
+        """
+        with self.lock:
+            file_hashes = dict(self.file_hashes)
+        return MerkleTree(file_hashes)
+
+    def root_hash(self):
+        """
+        Hash raiz de todos os arquivos monitorados; iguais apenas se todo o conteúdo for igual.
+        """
+        return self.merkle_tree().root
+
+    def locate_changes(self, trusted_tree):
+        """
+        Compara o estado atual com uma árvore confiável (ex.: de uma cópia de segurança)
+        e retorna os arquivos alterados, adicionados e removidos.
+        """
+        return self.merkle_tree().diff(trusted_tree)
 
     def monitor(self):
         """
@@ -33,57 +123,156 @@ class SecurityMonitor:
             if not os.path.exists(path):
                 logging.warning(f"Caminho não encontrado para monitoramento: {path}")
 
-        # Iniciar threads de monitoramento
-        threading.Thread(target=self._monitor_file_changes).start()
-        threading.Thread(target=self._monitor_access_attempts).start()
+        # Agendar as verificações periódicas
+        self.scheduler.add("integridade", self.scan, self.scan_interval, jitter=self.jitter)
+        self.scheduler.add("acessos", self._check_access_attempts, self.access_interval, jitter=self.jitter)
+        if self.use_inotify and self._watcher is None:
+            self._watcher = self._create_watcher()
+        if self._watcher is not None:
+            self.scheduler.add("eventos de arquivo", self._check_file_events, self.event_interval)
+        self.scheduler.start()
 
-    def _monitor_file_changes(self):
+    def stop(self, timeout=10.0):
         """
-        Monitora mudanças nos arquivos, verificando seus hashes.
+        Encerra o monitoramento: aguarda a verificação em andamento, grava o manifesto
+        e os eventos pendentes.
+        :return: True se o agendador terminou dentro do prazo.
         """
-        while True:
-            with self.lock:
-                for path in self.data_paths:
-                    for root, dirs, files in os.walk(path):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            self._check_file_integrity(file_path)
-            time.sleep(30)  # Verificar a cada 30 segundos
+        stopped = self.scheduler.stop(timeout)
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+        self.save_manifest()
+        self.event_log.flush(timeout)
+        logging.info("Monitoramento de segurança encerrado.")
+        return stopped
+
+    def _check_file_events(self):
+        """
+        Verifica apenas os arquivos apontados pelo inotify desde a última chamada; se a fila
+        de eventos do kernel transbordou, faz uma varredura completa.
+        """
+        if self._watcher.overflowed:
+            self._watcher.overflowed = False
+            self.scan()
+            return
+        for file_path in self._watcher.poll(timeout=0):
+            self._check_file_integrity(file_path)
+        self.save_manifest()
+
+    def _create_watcher(self):
+        """
+        Cria o observador inotify; em sistemas sem suporte, mantém as varreduras periódicas.
+        """
+        try:
+            from InotifyWatcher import InotifyWatcher
+            return InotifyWatcher([path for path in self.data_paths if os.path.isdir(path)])
+        except OSError as e:
+            logging.warning(f"inotify indisponível, usando varreduras periódicas: {e}")
+            return None
+
+    def scan(self):
+        """
+        Percorre os caminhos monitorados e verifica cada arquivo. O lock é mantido apenas
+        durante a atualização de cada arquivo, não durante toda a varredura.
+        :return: Relatório com arquivos verificados, recalculados, alterados e removidos.
+        """
+        start = time.perf_counter()
+        report = {"verificados": 0, "recalculados": 0, "alterados": 0, "removidos": 0}
+        seen = set()
+        for path in self.data_paths:
+            for root, dirs, files in os.walk(path):
+                for file in files:
+                    file_path = os.path.join(root, file)
+                    seen.add(file_path)
+                    report["verificados"] += 1
+                    result = self._check_file_integrity(file_path)
+                    if result in ("recalculado", "alterado"):
+                        report["recalculados"] += 1
+                    if result == "alterado":
+                        report["alterados"] += 1
+
+        with self.lock:
+            removed = [file_path for file_path in self.file_hashes if file_path not in seen]
+        for file_path in removed:
+            if self._check_file_integrity(file_path) == "removido":
+                report["removidos"] += 1
+
+        root = self.save_manifest()
+        if root is not None:
+            report["raiz"] = root
+        report["segundos"] = round(time.perf_counter() - start, 3)
+        self.last_scan_report = report
+        return report
 
     def _check_file_integrity(self, file_path):
         """
-        Verifica a integridade do arquivo usando hashes MD5.
+        Verifica a integridade do arquivo usando hashes BLAKE2b.
+        No modo incremental, o hash só é recalculado se os metadados do arquivo mudaram.
+        :return: "inalterado", "recalculado", "alterado", "removido" ou None em caso de erro.
         """
         try:
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                with self.lock:
+                    known = self.file_hashes.pop(file_path, None) is not None
+                    self.file_stats.pop(file_path, None)
+                    self._manifest_dirty = self._manifest_dirty or known
+                if known:
+                    logging.error(f"Arquivo monitorado removido: {file_path}")
+                    self._log_security_event(f"Arquivo removido: {file_path}", level="error",
+                                             tipo="arquivo_removido", arquivo=file_path)
+                    return "removido"
+                return None
+
+            # O ctime não pode ser restaurado por quem altera o arquivo, ao contrário do mtime
+            signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino, stat.st_ctime_ns)
+            if self.incremental:
+                with self.lock:
+                    if self.file_stats.get(file_path) == signature and file_path in self.file_hashes:
+                        return "inalterado"
+
+            # O hash é calculado fora do lock; apenas a comparação e a atualização são protegidas
             file_hash = self._calculate_file_hash(file_path)
-            if file_path in self.file_hashes:
-                if self.file_hashes[file_path] != file_hash:
-                    logging.error(f"Alteração não autorizada detectada no arquivo: {file_path}")
-                    self._log_security_event(f"Alteração detectada no arquivo: {file_path}")
-            self.file_hashes[file_path] = file_hash
+            with self.lock:
+                previous = self.file_hashes.get(file_path)
+                self.file_hashes[file_path] = file_hash
+                self.file_stats[file_path] = signature
+                self._manifest_dirty = True
+            if previous is not None and previous != file_hash:
+                logging.error(f"Alteração não autorizada detectada no arquivo: {file_path}")
+                self._log_security_event(f"Alteração detectada no arquivo: {file_path}", level="error",
+                                         tipo="arquivo_alterado", arquivo=file_path)
+                return "alterado"
+            return "recalculado"
         except Exception as e:
             logging.error(f"Erro ao verificar integridade do arquivo {file_path}: {e}")
+            return None
 
     def _calculate_file_hash(self, file_path):
         """
-        Calcula o hash MD5 de um arquivo.
+        Calcula o hash BLAKE2b de um arquivo, lendo blocos grandes em um buffer reutilizado.
         """
-        hash_md5 = hashlib.md5()
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        file_hash = hashlib.blake2b()
+        buffer = bytearray(self.buffer_size)
+        view = memoryview(buffer)
+        with open(file_path, 'rb', buffering=0) as f:
+            while True:
+                size = f.readinto(buffer)
+                if not size:
+                    break
+                file_hash.update(view[:size])
+        return file_hash.hexdigest()
 
-    def _monitor_access_attempts(self):
+    def _check_access_attempts(self):
         """
-        Monitora tentativas de acesso aos arquivos e rastreia IPs suspeitos.
+        Verifica tentativas de acesso aos arquivos e rastreia IPs suspeitos.
         """
-        while True:
-            ip = self._get_current_ip()
-            if ip in self.blocked_ips:
-                logging.warning(f"Tentativa de acesso bloqueada do IP: {ip}")
-                self._log_security_event(f"IP bloqueado tentou acesso: {ip}")
-            time.sleep(10)  # Verificar a cada 10 segundos
+        ip = self._get_current_ip()
+        if ip in self.blocked_ips:
+            logging.warning(f"Tentativa de acesso bloqueada do IP: {ip}")
+            self._log_security_event(f"IP bloqueado tentou acesso: {ip}", tipo="ip_bloqueado", ip=ip)
 
     def _get_current_ip(self):
         """
@@ -104,12 +293,11 @@ class SecurityMonitor:
         self.blocked_ips.add(ip)
         logging.info(f"IP bloqueado: {ip}")
 
-    def _log_security_event(self, message):
+    def _log_security_event(self, message, level="warning", **fields):
         """
-        Registra eventos de segurança em um arquivo de log.
+        Registra eventos de segurança no log (JSON lines), sem esperar pela gravação em disco.
         """
-        with open(self.access_logs, 'a') as log_file:
-            log_file.write(f"{message}\n")
+        self.event_log.log(message, level=level, **fields)
 
 # Exemplo de uso
 if __name__ == "__main__":
@@ -120,3 +308,8 @@ if __name__ == "__main__":
     ]
     security_monitor = SecurityMonitor(data_paths)
     security_monitor.monitor()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        security_monitor.stop()
@@ -0,0 +1,145 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Gerador determinístico de dados financeiros sintéticos de uma transportadora, para
+# benchmarks e testes de carga. A mesma semente sempre gera exatamente os mesmos dados.
+
+# (nome, categoria, valor típico em reais)
+SUPPLIERS = [
+    ("Posto Rodovia Diesel", "Combustível", 1800.0),
+    ("Auto Posto Estrela", "Combustível", 1500.0),
+    ("Distribuidora Arla Sul", "Combustível", 400.0),
+    ("Pneus Rodoforte", "Pneus", 2400.0),
+    ("Recapadora Vale", "Pneus", 900.0),
+    ("Oficina Diesel Center", "Manutenção", 1200.0),
+    ("Auto Peças Caminhoneiro", "Manutenção", 650.0),
+    ("Lubrificantes Norte", "Manutenção", 300.0),
+    ("Pedágio Sem Parar", "Pedágio", 250.0),
+    ("Seguradora Estrada Segura", "Seguros", 3200.0),
+    ("Rastreamento Satélite", "Tecnologia", 180.0),
+    ("Banco Financiamento Frota", "Financiamento", 8500.0),
+    ("Leasing Caminhões", "Financiamento", 7200.0),
+    ("Folha Motoristas", "Pessoal", 4500.0),
+    ("Restaurante Parada Certa", "Viagem", 90.0),
+    ("Hotel Beira Estrada", "Viagem", 160.0),
+    ("Despachante Licenciamento", "Impostos e Taxas", 700.0),
+    ("Lavagem Truck Clean", "Manutenção", 120.0),
+]
+
+CLIENTS = [
+    ("Agro Grãos Cerrado", "Frete Agrícola", 9500.0),
+    ("Cooperativa Soja Forte", "Frete Agrícola", 12000.0),
+    ("Indústria Cimento Real", "Frete Industrial", 7800.0),
+    ("Siderúrgica Aço Vivo", "Frete Industrial", 14500.0),
+    ("Atacadista Bom Preço", "Frete Varejo", 4200.0),
+    ("Supermercados União", "Frete Varejo", 3600.0),
+    ("Madeireira Pinhal", "Frete Industrial", 5100.0),
+    ("Distribuidora Bebidas Sol", "Frete Varejo", 3900.0),
+    ("Mineradora Serra Alta", "Frete Industrial", 18000.0),
+    ("Laticínios Campo Verde", "Frete Refrigerado", 6400.0),
+]
+
+SCHEDULED = [
+    ("Parcela financiamento cavalo mecânico", "Financiamento", 8500.0),
+    ("Seguro anual da frota", "Seguro", 3200.0),
+    ("IPVA frota", "Imposto", 2600.0),
+    ("Revisão programada", "Manutenção", 1400.0),
+    ("Troca de pneus programada", "Pneus", 5200.0),
+    ("Licenciamento anual", "Taxa", 450.0),
+]
+
+# Colunas de cada tipo: (contraparte, categoria, coluna da planilha da contraparte)
+LAYOUTS = {
+    "custos": (SUPPLIERS, "Fornecedor", "Categoria", "Fornecedor - Nome"),
+    "receitas": (CLIENTS, "Cliente", "Categoria", "Cliente - Nome"),
+    "programados": (SCHEDULED, "Descrição", "Tipo Programado", "Descrição"),
+}
+
+def generate(data_type, rows, start="2020-01", months=36, seed=42, raw=False, brazilian_dates=False):
+    """
+    Gera dados sintéticos de um tipo, com sazonalidade anual, tendência de crescimento e
+    valores log-normais em torno do valor típico de cada contraparte.
+    :param data_type: Tipo de dado (custos, receitas, programados).
+    :param rows: Quantidade de linhas (testado de 10 mil a 10 milhões).
+    :param start: Primeiro mês ("yyyy-MM").
+    :param months: Quantidade de meses cobertos.
+    :param seed: Semente do gerador aleatório.
+    :param raw: Gera as colunas da planilha de origem (como lidas pelo ExcelImporter)
+                em vez das colunas processadas.
+    :param brazilian_dates: Nas colunas da planilha, grava as datas como texto "dd/mm/yyyy".
+    :return: DataFrame ordenado por data de pagamento.
+    """
+    counterparties, counterparty_column, category_column, raw_counterparty_column = LAYOUTS[data_type]
+    rng = np.random.default_rng([seed, list(LAYOUTS).index(data_type)])
+
+    # Contrapartes mais frequentes no início da lista (distribuição de Zipf truncada)
+    weights = 1.0 / np.arange(1, len(counterparties) + 1)
+    codes = rng.choice(len(counterparties), size=rows, p=weights / weights.sum())
+
+    first_day = pd.Timestamp(f"{start}-01")
+    last_day = first_day + pd.DateOffset(months=months)
+    span = (last_day - first_day).days
+    days = np.sort(rng.integers(0, span, size=rows))
+    dates = first_day.to_datetime64() + days.astype('timedelta64[D]')
+
+    typical = np.array([value for _, _, value in counterparties])[codes]
+    elapsed_years = days / 365.25
+    seasonality = 1 + 0.15 * np.sin(2 * np.pi * (elapsed_years - 0.25))
+    trend = 1.05 ** elapsed_years
+    values = np.round(typical * seasonality * trend * rng.lognormal(0.0, 0.35, size=rows), 2)
+
+    # Nomes e categorias são montados a partir dos códigos, sem criar milhões de strings
+    names = pd.Categorical.from_codes(codes, categories=[name for name, _, _ in counterparties])
+    category_names = sorted({category for _, category, _ in counterparties})
+    category_codes = np.array([category_names.index(category) for _, category, _ in counterparties])
+    categories = pd.Categorical.from_codes(category_codes[codes], categories=category_names)
+
+    if raw:
+        payment = pd.Series(dates).dt.strftime("%d/%m/%Y") if brazilian_dates else dates
+        if data_type == "programados":
+            return pd.DataFrame({raw_counterparty_column: names, "Tipo": categories,
+                                 "Pagamento": payment, "Valor": values})
+        return pd.DataFrame({raw_counterparty_column: names, "Pagamento": payment, "Valor": values})
+
+    if data_type == "programados":
+        return pd.DataFrame({counterparty_column: names, category_column: categories,
+                             "Data Pagamento": dates, "Valor": values})
+    return pd.DataFrame({counterparty_column: names, "Data Pagamento": dates, "Valor": values,
+                         category_column: categories})
+
+def generate_combined(rows, seed=42, **kwargs):
+    """
+    Custos e receitas em um único DataFrame com a coluna 'Tipo', no formato usado pelas análises.
+    Receitas correspondem a cerca de um terço das linhas.
+    """
+    costs = generate("custos", rows - rows // 3, seed=seed, **kwargs).assign(Tipo="Custo")
+    revenues = generate("receitas", rows // 3, seed=seed, **kwargs).assign(Tipo="Receita")
+    combined = pd.concat([costs, revenues], ignore_index=True)
+    for column in ("Fornecedor", "Cliente", "Categoria", "Tipo"):
+        combined[column] = combined[column].astype('category')
+    return combined
+
+def write_excel(file_path, data_type, rows, **kwargs):
+    """
+    Gera uma planilha no formato de exportação lido pelo ExcelImporter.
+    Planilhas .xlsx comportam até 1.048.575 linhas de dados.
+    """
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    generate(data_type, rows, raw=True, **kwargs).to_excel(file_path, index=False)
+    return file_path
+
+def write_partitions(importer, data_type, rows, **kwargs):
+    """
+    Gera os dados e grava uma partição criptografada por mês com o ExcelImporter informado.
+    :return: Quantidade de partições gravadas.
+    """
+    df = generate(data_type, rows, **kwargs)
+    months = df["Data Pagamento"].dt.strftime("%Y-%m")
+    partitions = 0
+    for month, partition in df.groupby(months, sort=True):
+        importer.save_encrypted_data(partition.reset_index(drop=True), data_type, month)
+        partitions += 1
+    return partitions